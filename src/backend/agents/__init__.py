@@ -1,9 +1,31 @@
 """Agent configurations and middleware."""
 
-from .main_agent import agent
-from .middleware import tool_logging_middleware
+from .main_agent import get_agent, get_chat_client, warm_up_chat_client
 
 __all__ = [
-    "agent",
+    "get_agent",
+    "get_chat_client",
+    "warm_up_chat_client",
     "tool_logging_middleware",
+    "chat_tracing_middleware",
+    "terminal_tool_middleware",
+    "tool_batch_middleware",
+    "prompt_layout_middleware",
+    "token_usage_middleware",
 ]
+
+
+def __getattr__(name: str):
+    # The middleware module imports agent_framework; load it only when asked for.
+    if name in (
+        "tool_logging_middleware",
+        "chat_tracing_middleware",
+        "terminal_tool_middleware",
+        "tool_batch_middleware",
+        "prompt_layout_middleware",
+        "token_usage_middleware",
+    ):
+        from . import middleware
+
+        return getattr(middleware, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
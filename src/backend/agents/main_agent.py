@@ -1,30 +1,21 @@
-"""Main AGUIAssistant agent configuration."""
-
-from agent_framework import ChatAgent
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import DefaultAzureCredential
-
-from config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT_NAME
-from tools import get_weather, get_current_time, calculate, bedtime_story_tool
-from .middleware import tool_logging_middleware
-
-# Create Azure OpenAI chat client
-chat_client = AzureOpenAIChatClient(
-    credential=DefaultAzureCredential(),
-    endpoint=AZURE_OPENAI_ENDPOINT,
-    deployment_name=AZURE_OPENAI_DEPLOYMENT_NAME,
-)
-
-# Prevent runaway tool-call loops. Agent Framework's default allows many tool iterations
-# per single user request; if the model misbehaves, it can repeatedly invoke the same
-# tool. We expect at most one tool call + (optionally) one follow-up assistant message.
-if chat_client.function_invocation_configuration is not None:
-    chat_client.function_invocation_configuration.max_iterations = 2
-
-# Create the AI agent with tools
-agent = ChatAgent(
-    name="AGUIAssistant",
-    instructions="""You are a helpful assistant with access to tools.
+"""Main AGUIAssistant agent configuration.
+
+The chat client and agent are built on first use (normally during the app lifespan
+warm-up) rather than at import time, so importing the API stays cheap and the
+server can answer health checks while the agent stack loads.
+"""
+
+import asyncio
+from functools import cache
+from typing import TYPE_CHECKING
+
+from config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT_NAME, validate_config
+
+if TYPE_CHECKING:
+    from agent_framework import ChatAgent
+    from agent_framework.azure import AzureOpenAIChatClient
+
+INSTRUCTIONS = """You are a helpful assistant with access to tools.
 
 The application provides shared state (shown as "Current state of the application").
 If it contains:
@@ -67,8 +58,99 @@ For BEDTIME STORIES:
 - Call tell_bedtime_story ONCE
 - Then reply with a short closing line like: "Sweet dreams." (do NOT call any tool again)
 
-NEVER call a tool more than once per request.""",
-    chat_client=chat_client,
-    tools=[get_weather, get_current_time, calculate, bedtime_story_tool],
-    middleware=[tool_logging_middleware],
-)
+NEVER call a tool more than once per request."""
+
+
+@cache
+def get_chat_client() -> "AzureOpenAIChatClient":
+    """Create the shared Azure OpenAI chat client (used by the main agent and the storyteller)."""
+    import httpx
+    from agent_framework.azure import AzureOpenAIChatClient
+    from azure.identity import DefaultAzureCredential
+    from openai import DEFAULT_CONNECTION_LIMITS, DefaultAsyncHttpxClient
+
+    from utils.tracing import AsyncTracingTransport
+
+    validate_config()
+
+    # Create Azure OpenAI chat client
+    chat_client = AzureOpenAIChatClient(
+        credential=DefaultAzureCredential(),
+        endpoint=AZURE_OPENAI_ENDPOINT,
+        deployment_name=AZURE_OPENAI_DEPLOYMENT_NAME,
+    )
+
+    # The SDK builds its own httpx client; give it one whose transport adds a client span
+    # to every Azure OpenAI request (with the SDK's default connection limits).
+    chat_client.client = chat_client.client.copy(
+        http_client=DefaultAsyncHttpxClient(
+            transport=AsyncTracingTransport(httpx.AsyncHTTPTransport(limits=DEFAULT_CONNECTION_LIMITS))
+        )
+    )
+
+    # Prevent runaway tool-call loops. Agent Framework's default allows many tool iterations
+    # per single user request; if the model misbehaves, it can repeatedly invoke the same
+    # tool. We expect at most one tool call + (optionally) one follow-up assistant message.
+    if chat_client.function_invocation_configuration is not None:
+        chat_client.function_invocation_configuration.max_iterations = 2
+
+    return chat_client
+
+
+async def warm_up_chat_client() -> None:
+    """Open the Azure OpenAI connection pool (DNS, TLS and auth) before the first request."""
+    from openai import APIStatusError
+
+    # The first call imports the SDK and sets up credentials; keep that off the event loop.
+    chat_client = await asyncio.to_thread(get_chat_client)
+    client = chat_client.client.with_options(max_retries=0, timeout=10.0)
+    try:
+        await client.models.list()
+    except APIStatusError:
+        pass  # Any HTTP response means the connection is open
+
+
+@cache
+def get_agent() -> "ChatAgent":
+    """Create the AI agent with tools."""
+    from agent_framework import ChatAgent
+
+    from config import TOOL_CONCURRENCY, TOOL_THREAD_POOL_SIZE, TOOL_TIMEOUT, TOOL_TIMEOUTS
+    from tools import get_weather, get_current_time, calculate, create_bedtime_story_tool
+    from tools.executor import ToolExecutor, parse_tool_map
+    from .middleware import (
+        chat_tracing_middleware,
+        prompt_layout_middleware,
+        terminal_tool_middleware,
+        token_usage_middleware,
+        tool_batch_middleware,
+        tool_logging_middleware,
+    )
+
+    chat_client = get_chat_client()
+    bedtime_story_tool = create_bedtime_story_tool(
+        chat_client, middleware=[token_usage_middleware, chat_tracing_middleware]
+    )
+    executor = ToolExecutor(
+        max_workers=TOOL_THREAD_POOL_SIZE,
+        default_timeout=TOOL_TIMEOUT,
+        timeouts=parse_tool_map(TOOL_TIMEOUTS),
+        concurrency=parse_tool_map(TOOL_CONCURRENCY),
+    )
+
+    return ChatAgent(
+        name="AGUIAssistant",
+        instructions=INSTRUCTIONS,
+        chat_client=chat_client,
+        tools=executor.wrap_all([get_weather, get_current_time, calculate, bedtime_story_tool]),
+        # terminal_tool_middleware runs first: a skipped model call gets no span or usage, and
+        # it sees the tool results as the last message before prompt_layout_middleware appends state.
+        middleware=[
+            tool_logging_middleware,
+            tool_batch_middleware,
+            terminal_tool_middleware,
+            prompt_layout_middleware,
+            token_usage_middleware,
+            chat_tracing_middleware,
+        ],
+    )
@@ -1,10 +1,56 @@
-"""Tool logging middleware for agent framework."""
+"""Tool logging, terminal tool, prompt layout, token usage and chat tracing middleware for agent framework."""
 
+import json
 import time
 from collections.abc import Awaitable, Callable
-from agent_framework import FunctionInvocationContext, function_middleware
+from contextvars import ContextVar
+from agent_framework import (
+    ChatContext,
+    ChatMessage,
+    ChatResponse,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    FunctionInvocationContext,
+    FunctionResultContent,
+    Role,
+    TextContent,
+    UsageContent,
+    UsageDetails,
+    chat_middleware,
+    function_middleware,
+)
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
 
-from utils import logger
+from tools import terminal_reply
+from utils import logger, Truncated
+from utils.run_context import current_tool, run_record, run_usage, shared_state
+from utils.tracing import traced_stream, tracer
+from utils.usage import record_usage
+
+
+class _ToolBatch:
+    """Timing of the tool calls requested by one model response."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.pending = 0
+        self.started = 0.0
+        self.busy = 0.0
+
+
+# Set per chat-client call by tool_batch_middleware; the tool-call tasks inherit it.
+_tool_batch: ContextVar[_ToolBatch | None] = ContextVar("tool_batch", default=None)
+
+
+@chat_middleware
+async def tool_batch_middleware(
+    context: ChatContext,
+    next: Callable[[ChatContext], Awaitable[None]],
+) -> None:
+    """Middleware that starts a new tool batch for the calls of each model response."""
+    _tool_batch.set(_ToolBatch())
+    await next(context)
 
 
 @function_middleware
@@ -12,23 +58,228 @@ async def tool_logging_middleware(
     context: FunctionInvocationContext,
     next: Callable[[FunctionInvocationContext], Awaitable[None]],
 ) -> None:
-    """Middleware that logs tool calls with timing information."""
+    """Middleware that logs tool calls with timing information.
+
+    Calls from the same model response run concurrently; each call logs its own
+    duration, and the last one to finish logs the wall time of the whole batch.
+    """
     function_name = context.function.name
     args = context.arguments
     
-    logger.info(f"Tool call started: {function_name}")
-    logger.info(f"  Arguments: {args}")
-    
-    start_time = time.time()
-    
-    await next(context)
+    logger.info("Tool call started: %s", function_name)
+    logger.info("  Arguments: %s", args)
     
-    duration = time.time() - start_time
+    batch = _tool_batch.get()
+    start_time = time.perf_counter()
+    if batch is not None:
+        if batch.pending == 0:
+            batch.calls, batch.started, batch.busy = 0, start_time, 0.0
+        batch.calls += 1
+        batch.pending += 1
     
-    logger.info(f"Tool call completed: {function_name} (took {duration:.3f}s)")
+    outcome = "failed"
+    tool_token = current_tool.set(function_name)
+    try:
+        with tracer.start_as_current_span(
+            f"execute_tool {function_name}",
+            attributes={"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": function_name},
+        ):
+            await next(context)
+        outcome = "completed"
+    finally:
+        current_tool.reset(tool_token)
+        end_time = time.perf_counter()
+        duration = end_time - start_time
+        logger.info("Tool call %s: %s (took %.3fs)", outcome, function_name, duration)
+        record = run_record.get()
+        if record is not None:
+            record.tool(function_name, duration, outcome == "completed")
+        if batch is not None:
+            batch.busy += duration
+            batch.pending -= 1
+            # All calls of a batch start before any finishes: each one awaits the executor.
+            if batch.pending == 0 and batch.calls > 1:
+                logger.info(
+                    "Tool batch completed: %d calls in %.3fs wall (%.3fs total tool time)",
+                    batch.calls,
+                    end_time - batch.started,
+                    batch.busy,
+                )
+
     if context.result is not None:
-        # Truncate long results for logging
-        result_str = str(context.result)
-        if len(result_str) > 200:
-            result_str = result_str[:200] + "..."
-        logger.info(f"  Result: {result_str}")
+        # Truncate long results for logging (only stringified if the record is emitted)
+        logger.info("  Result: %s", Truncated(context.result, 200))
+
+
+def _model_id(context: ChatContext) -> str | None:
+    return getattr(context.chat_options, "model_id", None) or getattr(context.chat_client, "model_id", None)
+
+
+@chat_middleware
+async def chat_tracing_middleware(
+    context: ChatContext,
+    next: Callable[[ChatContext], Awaitable[None]],
+) -> None:
+    """Middleware that wraps every chat-client call in a span.
+
+    For streaming calls the span stays open until the response stream is consumed,
+    so its duration covers time-to-last-token rather than just the request setup.
+    """
+    model = _model_id(context)
+    span = tracer.start_span(
+        f"chat {model or 'unknown'}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "gen_ai.operation.name": "chat",
+            "gen_ai.request.model": str(model or ""),
+            "agui.chat.message_count": len(context.messages),
+            "agui.chat.streaming": context.is_streaming,
+        },
+    )
+    try:
+        # Make the span current so the SDK's HTTP request spans nest under it.
+        with trace.use_span(span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+            await next(context)
+    except Exception as exc:
+        span.record_exception(exc)
+        span.end()
+        raise
+
+    if context.is_streaming and context.result is not None and hasattr(context.result, "__aiter__"):
+        context.result = traced_stream(span, context.result)  # type: ignore[arg-type]
+    else:
+        span.end()
+
+
+def _terminal_turn_reply(context: ChatContext) -> str | None:
+    """Closing reply if the last turn only called terminal tools (and they succeeded)."""
+    messages = context.messages
+    if not messages or messages[-1].role != Role.TOOL:
+        return None
+    results = [c for c in messages[-1].contents if isinstance(c, FunctionResultContent)]
+    if not results or any(r.exception is not None for r in results):
+        return None
+
+    # Map the results back to the tool names of the assistant's function calls.
+    call_ids = {r.call_id for r in results}
+    names: dict[str, str] = {}
+    for message in reversed(messages[:-1]):
+        for content in message.contents:
+            if isinstance(content, FunctionCallContent) and content.call_id in call_ids:
+                names[content.call_id] = content.name
+        if len(names) == len(call_ids):
+            break
+    if len(names) != len(call_ids):
+        return None
+
+    tools = {getattr(tool, "name", None): tool for tool in (context.chat_options.tools or [])}
+    replies: list[str] = []
+    for name in dict.fromkeys(names[r.call_id] for r in results):
+        reply = terminal_reply(tools.get(name), shared_state.get())
+        if reply is None:
+            return None
+        if reply and reply not in replies:
+            replies.append(reply)
+    return " ".join(replies)
+
+
+async def _single_update(update: ChatResponseUpdate):
+    yield update
+
+
+@chat_middleware
+async def terminal_tool_middleware(
+    context: ChatContext,
+    next: Callable[[ChatContext], Awaitable[None]],
+) -> None:
+    """Middleware that ends the run after terminal tools without calling the model again.
+
+    When the previous model turn only called tools marked with ``tools.terminal``, the
+    follow-up call is answered with the tool's templated reply instead.
+    """
+    reply = _terminal_turn_reply(context)
+    if reply is None:
+        await next(context)
+        return
+
+    logger.info("Terminal tool result; skipping follow-up model call (reply=%r)", reply)
+    contents = [TextContent(text=reply)] if reply else []
+    if context.is_streaming:
+        context.result = _single_update(ChatResponseUpdate(role=Role.ASSISTANT, contents=contents))
+    else:
+        context.result = ChatResponse(messages=[ChatMessage(role=Role.ASSISTANT, contents=contents)])
+    context.terminate = True
+
+
+STATE_HEADER = "Current state of the application:"
+
+
+def _is_state_block(message: ChatMessage) -> bool:
+    return message.role == Role.SYSTEM and message.text.startswith(STATE_HEADER)
+
+
+@chat_middleware
+async def prompt_layout_middleware(
+    context: ChatContext,
+    next: Callable[[ChatContext], Awaitable[None]],
+) -> None:
+    """Middleware that keeps the prompt prefix byte-stable for prompt caching.
+
+    The AG-UI orchestrator inserts the shared state (JSON in the client's key order)
+    between the instructions and the conversation, and only on fresh user turns, so a
+    state change or a tool round trip changes the prefix and defeats Azure OpenAI's
+    prefix cache. Here the state block is rendered canonically and always sent last,
+    after the append-only conversation history. Only the state JSON is re-rendered; the
+    orchestrator's instructions on updating state are kept after it, unchanged.
+    """
+    messages: list[ChatMessage] = []
+    instructions = ""
+    for message in context.messages:
+        if _is_state_block(message):
+            # "<header>\n<indented JSON>\n\n<instructions>"; the JSON has no blank lines.
+            instructions = message.text.partition("\n\n")[2]
+        else:
+            messages.append(message)
+    state = shared_state.get()
+    if state:
+        state_json = json.dumps(state, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        text = f"{STATE_HEADER}\n{state_json}"
+        if instructions:
+            text += f"\n\n{instructions}"
+        messages.append(ChatMessage(role=Role.SYSTEM, text=text))
+    context.messages = messages
+    await next(context)
+
+
+async def _recording_usage(stream, record: Callable[[UsageDetails], None]):
+    async for update in stream:
+        for content in update.contents:
+            if isinstance(content, UsageContent):
+                record(content.details)
+        yield update
+
+
+@chat_middleware
+async def token_usage_middleware(
+    context: ChatContext,
+    next: Callable[[ChatContext], Awaitable[None]],
+) -> None:
+    """Middleware that records the token usage of every chat-client call.
+
+    Calls made while a tool runs (e.g. the storyteller sub-agent) are attributed to
+    that tool, all others to "agent".
+    """
+    source = current_tool.get() or "agent"
+    totals = run_usage.get()
+    model = str(_model_id(context) or "unknown")
+
+    def record(details: UsageDetails) -> None:
+        cached = details.additional_counts.get("prompt/cached_tokens", 0)
+        record_usage(totals, source, model, details.input_token_count or 0, cached, details.output_token_count or 0)
+
+    await next(context)
+
+    if context.is_streaming and context.result is not None and hasattr(context.result, "__aiter__"):
+        context.result = _recording_usage(context.result, record)  # type: ignore[arg-type]
+    elif isinstance(context.result, ChatResponse) and context.result.usage_details is not None:
+        record(context.result.usage_details)
@@ -1,19 +1,75 @@
 """FastAPI application setup and configuration."""
 
-import logging
+import asyncio
+import hmac
+import os
+import re
 import sys
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from ag_ui.core import BaseEvent, CustomEvent, EventType, RunFinishedEvent
 from ag_ui.encoder import EventEncoder
-from agent_framework_ag_ui import AgentFrameworkAgent
 
-from config import CORS_ORIGINS
+from config import (
+    AGUI_RECORD_DIR,
+    AGUI_REPLAY_DIR,
+    AGUI_REPLAY_MATCH,
+    AGUI_REPLAY_SPEED,
+    CORS_ORIGINS,
+    ENTRA_AUDIENCE,
+    ENTRA_TENANT_ID,
+    LOOP_MONITOR_ENABLED,
+    LOOP_MONITOR_INTERVAL,
+    LOOP_STALL_THRESHOLD,
+    PROFILE_ADMIN_TOKEN,
+    PROFILE_DIR,
+    PROFILE_INTERVAL,
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_MB,
+    RESPONSE_CACHE_TOOL_TTLS,
+    RESPONSE_CACHE_TTL,
+    RUN_ANALYTICS_BATCH_SIZE,
+    RUN_ANALYTICS_DB,
+    RUN_ANALYTICS_ENABLED,
+    RUN_ANALYTICS_FLUSH_INTERVAL,
+    RUN_ANALYTICS_RETENTION_DAYS,
+    STATE_DELTA_ENABLED,
+    STATE_FULL_SNAPSHOT_EVERY,
+    TOKEN_USAGE_EVENT,
+    WARMUP_ENABLED,
+    WARMUP_RETRY_INTERVAL,
+    WARMUP_STEP_TIMEOUT,
+    WARMUP_SYNTHETIC_TURN,
+    WEATHER_PREFETCH_ENABLED,
+    WS_AUTH_TIMEOUT,
+    WS_MAX_RUNS_PER_CONNECTION,
+    WS_SEND_QUEUE_SIZE,
+    validate_config,
+)
+from auth.entra import validate_token, warm_up_signing_keys
 from auth.middleware import authentication_middleware
-from agents import agent
+from utils import get_logger, logger
+from utils.loop_monitor import LoopMonitor, SamplingProfiler
+from utils.metrics import setup_metrics
+from utils.run_analytics import RunAnalytics, RunRecord
+from utils.run_context import run_record, run_usage, shared_state
+from utils.tracing import setup_tracing, tracing_middleware
+from utils.usage import UsageTotals
+from agents import get_agent, warm_up_chat_client
+from .recording import ReplayAgent, record_run
+from .response_cache import ResponseCache
 from .routes import router
+from .speculation import ApprovalWatcher
+from .state_delta import StateDeltaTracker
+from .warmup import WarmUpStep, warmup
+from .websocket import WebSocketConnection
 
 
 STATE_SCHEMA: dict[str, object] = {
@@ -30,17 +86,135 @@ STATE_SCHEMA: dict[str, object] = {
 }
 
 
-state_logger = logging.getLogger("agui.state")
-state_logger.setLevel(logging.INFO)
-if not state_logger.handlers:
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    handler.setFormatter(formatter)
-    state_logger.addHandler(handler)
+state_logger = get_logger("agui.state")
+usage_logger = get_logger("agui.usage")
+
+# Install the tracer/meter providers before any spans are created (no-ops when disabled).
+setup_tracing()
+setup_metrics()
+
+loop_monitor = LoopMonitor(interval=LOOP_MONITOR_INTERVAL, stall_threshold=LOOP_STALL_THRESHOLD)
+
+
+def _build_wrapped_agent():
+    """Import the agent stack and wrap the agent so we can stream AG-UI events."""
+    from agent_framework_ag_ui import AgentFrameworkAgent
+
+    start = time.perf_counter()
+    wrapped = AgentFrameworkAgent(agent=get_agent(), state_schema=STATE_SCHEMA)
+    logger.info("Agent stack ready (took %.3fs)", time.perf_counter() - start)
+    return wrapped
+
+
+_agent_build: asyncio.Future | None = None
+
+
+def _log_agent_build_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Building the agent stack failed: %s", future.exception())
+
+
+def _start_agent_build() -> asyncio.Future:
+    """Start building the agent in a worker thread, once (again after a failure)."""
+    global _agent_build
+    if _agent_build is None or (_agent_build.done() and not _agent_build.cancelled() and _agent_build.exception()):
+        _agent_build = asyncio.ensure_future(asyncio.to_thread(_build_wrapped_agent))
+        _agent_build.add_done_callback(_log_agent_build_failure)
+    return _agent_build
+
+
+async def get_wrapped_agent():
+    """Return the wrapped agent, waiting for the background build if it is still running."""
+    return await asyncio.shield(_start_agent_build())
+
+
+def _approval_watcher() -> ApprovalWatcher:
+    """Map each human-approval tool to the prefetch of the tool it approves."""
+    from tools.weather import weather_prefetch
+
+    return ApprovalWatcher({"approve_weather_request": (weather_prefetch, "location")})
+
+
+async def _warm_up_weather() -> None:
+    from tools import weather
+
+    await asyncio.to_thread(weather.warm_up)
+
+
+async def _synthetic_turn() -> None:
+    """Run one short agent turn through the AG-UI wrapper to warm every first-call path."""
+    wrapped = await get_wrapped_agent()
+    input_data = {
+        "thread_id": "warmup",
+        "run_id": "warmup",
+        "messages": [{"id": "warmup", "role": "user", "content": "Reply with just OK."}],
+    }
+    async for _ in wrapped.run_agent(input_data):
+        pass
+
+
+def _warmup_steps() -> list[WarmUpStep]:
+    steps: list[WarmUpStep] = []
+    if replay_agent is None:
+        steps.append(WarmUpStep("agent", get_wrapped_agent, required=True))
+    if WARMUP_ENABLED:
+        if ENTRA_TENANT_ID and ENTRA_AUDIENCE:
+            steps.append(WarmUpStep("jwks", warm_up_signing_keys))
+        if replay_agent is None:
+            steps.append(WarmUpStep("azure_openai", warm_up_chat_client))
+            steps.append(WarmUpStep("open_meteo", _warm_up_weather))
+            if WARMUP_SYNTHETIC_TURN:
+                steps.append(WarmUpStep("synthetic_turn", _synthetic_turn))
+    return steps
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if run_analytics is not None:
+        run_analytics.start()
+    if replay_agent is None:
+        # Fail fast on missing settings, then build the agent stack in the background
+        # so /health answers while it loads.
+        validate_config()
+        _start_agent_build()
+    # Warm-up runs in the background; /ready reports when it has finished.
+    warmup_task = asyncio.create_task(
+        warmup.run(_warmup_steps(), timeout=WARMUP_STEP_TIMEOUT, retry_interval=WARMUP_RETRY_INTERVAL)
+    )
+    yield
+    warmup_task.cancel()
+    await loop_monitor.stop()
+    if run_analytics is not None:
+        await asyncio.to_thread(run_analytics.stop)
+
+
+def _profiling_requested(request: Request) -> bool:
+    """Only admins holding PROFILE_ADMIN_TOKEN can turn on the per-run profiler."""
+    supplied = request.headers.get("x-agui-profile")
+    if not PROFILE_ADMIN_TOKEN or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+async def _profiled(stream: AsyncIterator[str], path: str) -> AsyncIterator[str]:
+    """Profile the event loop thread while ``stream`` is consumed, keeping only this run's samples.
+
+    This generator's frame is on the loop thread's stack exactly when the run is
+    executing, so it marks the samples that belong to the run.
+    """
+    profiler = SamplingProfiler(path, interval=PROFILE_INTERVAL, marker=sys._getframe())
+    profiler.start()
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await asyncio.to_thread(profiler.stop)
+
 
 # Create FastAPI app
-app = FastAPI(title="AG-UI Demo Server")
+app = FastAPI(title="AG-UI Demo Server", lifespan=lifespan)
 
 # Add CORS middleware for React frontend
 app.add_middleware(
@@ -54,17 +228,59 @@ app.add_middleware(
 # Add authentication middleware
 app.middleware("http")(authentication_middleware)
 
-# Wrap the agent so we can stream AG-UI events and log shared state on each reply.
-wrapped_agent = AgentFrameworkAgent(
-    agent=agent,
-    state_schema=STATE_SCHEMA,
+# Add tracing middleware last so it is outermost and token validation is traced too
+app.middleware("http")(tracing_middleware)
+
+# In replay mode, runs are served from recorded event streams instead of the model.
+replay_agent = (
+    ReplayAgent(AGUI_REPLAY_DIR, speed=AGUI_REPLAY_SPEED, match=AGUI_REPLAY_MATCH) if AGUI_REPLAY_DIR else None
 )
 
+# Serves repeated first-turn prompts from earlier runs instead of the model.
+response_cache = (
+    ResponseCache(
+        ttl=RESPONSE_CACHE_TTL,
+        tool_ttls=RESPONSE_CACHE_TOOL_TTLS,
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes=int(RESPONSE_CACHE_MAX_MB * 1_000_000),
+    )
+    if RESPONSE_CACHE_ENABLED and replay_agent is None
+    else None
+)
+
+# Per-run analytics, written to SQLite off the request path.
+run_analytics = (
+    RunAnalytics(
+        RUN_ANALYTICS_DB,
+        batch_size=RUN_ANALYTICS_BATCH_SIZE,
+        flush_interval=RUN_ANALYTICS_FLUSH_INTERVAL,
+        retention_days=RUN_ANALYTICS_RETENTION_DAYS,
+    )
+    if RUN_ANALYTICS_ENABLED
+    else None
+)
 
-@app.post("/")
-async def agent_endpoint(request: Request):  # type: ignore[misc]
-    input_data = await request.json()
 
+def _new_run_record(input_data: dict[str, Any], user: str, transport: str) -> RunRecord | None:
+    if run_analytics is None:
+        return None
+    return RunRecord(
+        run_id=str(input_data.get("run_id", "no-run-id")),
+        thread_id=str(input_data.get("thread_id", "no-thread-id")),
+        user=user,
+        transport=transport,
+    )
+
+
+async def run_events(
+    agent: Any, input_data: dict[str, Any], user: str, record: RunRecord | None = None
+) -> AsyncIterator[BaseEvent]:
+    """Run the agent on one AG-UI run input and yield the events to send to the client.
+
+    Shared by the SSE and WebSocket endpoints: shared-state tracking and deltas, the
+    approval watcher, the response cache, recording, token usage accounting and the
+    run's analytics ``record`` (submitted when the run ends, however it ends).
+    """
     run_id = input_data.get("run_id", "no-run-id")
     thread_id = input_data.get("thread_id", "no-thread-id")
     incoming_state = input_data.get("state") or {}
@@ -80,11 +296,22 @@ async def agent_endpoint(request: Request):  # type: ignore[misc]
         incoming_state.get("style"),
     )
 
-    async def event_generator():
-        encoder = EventEncoder()
-        current_state: dict[str, Any] = dict(incoming_state)
+    shared_state.set(dict(incoming_state))
+    usage = UsageTotals()
+    run_usage.set(usage)
+    run_record.set(record)
+    current_state: dict[str, Any] = dict(incoming_state)
+    state_tracker = StateDeltaTracker(STATE_FULL_SNAPSHOT_EVERY) if STATE_DELTA_ENABLED else None
+    approval_watcher = _approval_watcher() if WEATHER_PREFETCH_ENABLED and replay_agent is None else None
+    if approval_watcher is not None:
+        approval_watcher.observe_input(input_data)
 
-        async for event in wrapped_agent.run_agent(input_data):
+    events = response_cache.run_agent(agent, input_data) if response_cache else agent.run_agent(input_data)
+    if AGUI_RECORD_DIR and replay_agent is None:
+        events = record_run(events, input_data, AGUI_RECORD_DIR)
+
+    try:
+        async for event in events:
             # Track state snapshots as they stream.
             snapshot = getattr(event, "snapshot", None)
             if isinstance(snapshot, dict):
@@ -100,10 +327,85 @@ async def agent_endpoint(request: Request):  # type: ignore[misc]
                     current_state.get("style"),
                 )
 
-            yield encoder.encode(event)
+            if approval_watcher is not None:
+                approval_watcher.observe(event)
+
+            if state_tracker is not None:
+                event = state_tracker.process(event)
+                if event is None:
+                    continue
+
+            if TOKEN_USAGE_EVENT and isinstance(event, RunFinishedEvent) and usage.total.calls:
+                yield CustomEvent(name="token_usage", value=usage.as_dict())
+                if record is not None:
+                    record.event(EventType.CUSTOM.value)
+
+            if record is not None:
+                record.event(event.type.value)
+                if event.type == EventType.RUN_FINISHED:
+                    record.outcome = "finished"
+                elif event.type == EventType.RUN_ERROR:
+                    record.outcome = "error"
+            yield event
+    finally:
+        if record is not None:
+            record.finish()
+            record.state = {key: current_state.get(key) for key in STATE_SCHEMA}
+            record.input_tokens = usage.total.input_tokens
+            record.cached_input_tokens = usage.total.cached_input_tokens
+            record.output_tokens = usage.total.output_tokens
+            run_analytics.submit(record)
+
+    if state_tracker is not None and state_tracker.sent_bytes < state_tracker.snapshot_bytes:
+        state_logger.info(
+            "Shared state sync run_id=%s snapshot_bytes=%d sent_bytes=%d",
+            run_id,
+            state_tracker.snapshot_bytes,
+            state_tracker.sent_bytes,
+        )
+
+    if usage.total.calls:
+        usage_logger.info(
+            "Token usage run_id=%s user=%s calls=%d input=%d cached_input=%d uncached_input=%d output=%d "
+            "by_source=%s",
+            run_id,
+            user,
+            usage.total.calls,
+            usage.total.input_tokens,
+            usage.total.cached_input_tokens,
+            usage.total.uncached_input_tokens,
+            usage.total.output_tokens,
+            {source: u.as_dict() for source, u in usage.by_source.items()},
+        )
+
+
+async def _encoded(events: AsyncIterator[BaseEvent], record: RunRecord | None) -> AsyncIterator[str]:
+    encoder = EventEncoder()
+    async for event in events:
+        data = encoder.encode(event)
+        if record is not None:
+            record.bytes += len(data.encode())
+        yield data
+
+
+@app.post("/")
+async def agent_endpoint(request: Request):  # type: ignore[misc]
+    input_data = await request.json()
+
+    claims = getattr(request.state, "claims", None) or {}
+    user = claims.get("oid") or claims.get("sub") or "anonymous"
+    record = _new_run_record(input_data, user, "sse")
+    agent = replay_agent or await get_wrapped_agent()
+
+    stream = _encoded(run_events(agent, input_data, user, record), record)
+    if _profiling_requested(request):
+        run_id = input_data.get("run_id", "no-run-id")
+        safe_run_id = re.sub(r"[^A-Za-z0-9_-]", "", str(run_id))[:64]
+        profile_path = os.path.join(PROFILE_DIR, f"run-{safe_run_id}-{int(time.time())}.folded")
+        stream = _profiled(stream, profile_path)
 
     return StreamingResponse(
-        event_generator(),
+        stream,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -112,5 +414,34 @@ async def agent_endpoint(request: Request):  # type: ignore[misc]
         },
     )
 
+
+async def _websocket_run_events(input_data: dict[str, Any], user: str) -> AsyncIterator[str]:
+    record = _new_run_record(input_data, user, "websocket")
+    agent = replay_agent or await get_wrapped_agent()
+    async for event in run_events(agent, input_data, user, record):
+        data = event.model_dump_json(by_alias=True, exclude_none=True)
+        if record is not None:
+            record.bytes += len(data.encode())
+        yield data
+
+
+@app.websocket("/ws")
+async def agent_websocket(websocket: WebSocket):  # type: ignore[misc]
+    """AG-UI over a WebSocket, with several runs multiplexed per connection (see api/websocket.py)."""
+    origin = websocket.headers.get("origin")
+    if origin and origin not in CORS_ORIGINS:
+        # Browsers do not apply CORS to WebSockets, so check the origin here.
+        await websocket.close(code=1008)
+        return
+    connection = WebSocketConnection(
+        websocket,
+        _websocket_run_events,
+        validate_token=validate_token if ENTRA_TENANT_ID and ENTRA_AUDIENCE else None,
+        max_runs=WS_MAX_RUNS_PER_CONNECTION,
+        queue_size=WS_SEND_QUEUE_SIZE,
+        auth_timeout=WS_AUTH_TIMEOUT,
+    )
+    await connection.serve()
+
 # Include additional routes
 app.include_router(router)
@@ -0,0 +1,134 @@
+"""Record and replay AG-UI event streams.
+
+Recording writes one gzip-compressed JSONL file per run: a header line with the run
+input, then one line per event with its offset (seconds since the run started) and
+the event payload. Replay serves those recordings back through the normal endpoint,
+so the SSE, middleware and encoding stack is exercised without any model calls.
+"""
+
+import asyncio
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import time
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+from ag_ui.core import BaseEvent, Event, EventType
+from pydantic import TypeAdapter
+
+from utils import logger
+
+_event_adapter: TypeAdapter = TypeAdapter(Event)
+
+
+def _last_user_prompt(input_data: dict[str, Any]) -> str:
+    """Return the normalized text of the last user message in an AG-UI run input."""
+    for message in reversed(input_data.get("messages") or []):
+        if isinstance(message, dict) and message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return " ".join(str(content or "").lower().split())
+    return ""
+
+
+async def record_run(
+    events: AsyncIterator[BaseEvent],
+    input_data: dict[str, Any],
+    record_dir: str,
+) -> AsyncIterator[BaseEvent]:
+    """Pass ``events`` through unchanged while recording them with timestamps.
+
+    Events are buffered in memory and written in a worker thread once the run ends,
+    so recording adds no file I/O to the streaming path.
+    """
+    start = time.monotonic()
+    recorded: list[dict[str, Any]] = []
+    try:
+        async for event in events:
+            recorded.append({
+                "t": round(time.monotonic() - start, 4),
+                "event": event.model_dump(mode="json", by_alias=True, exclude_none=True),
+            })
+            yield event
+    finally:
+        run_id = re.sub(r"[^A-Za-z0-9_-]", "", str(input_data.get("run_id") or input_data.get("runId") or ""))[:64]
+        # The random suffix keeps runs that share a run_id (or have none) from sharing a file.
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_id or 'run'}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        path = os.path.join(record_dir, name)
+        await asyncio.to_thread(_write_recording, path, input_data, recorded)
+
+
+def _write_recording(path: str, input_data: dict[str, Any], recorded: list[dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        header = {"input": input_data, "prompt": _last_user_prompt(input_data), "recorded_at": time.time()}
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for line in recorded:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    logger.info("Recorded %d events to %s", len(recorded), path)
+
+
+class ReplayAgent:
+    """Serve recorded runs in place of the real agent.
+
+    Args:
+        replay_dir: Directory containing ``*.jsonl.gz`` recordings.
+        speed: Playback speed multiplier. ``1.0`` keeps the original timing, ``2.0`` is
+            twice as fast, ``0`` sends every event as fast as possible.
+        match: ``"prompt"`` picks a recording whose last user message matches the
+            request (falling back to a random one); ``"random"`` always picks at random.
+    """
+
+    def __init__(self, replay_dir: str, speed: float = 1.0, match: str = "prompt") -> None:
+        self.speed = speed
+        self.match = match
+        self._recordings: list[tuple[dict[str, Any], list[tuple[float, BaseEvent]]]] = []
+        self._by_prompt: dict[str, list[int]] = {}
+
+        for path in sorted(glob.glob(os.path.join(replay_dir, "*.jsonl.gz"))):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                events = [
+                    (line["t"], _event_adapter.validate_python(line["event"]))
+                    for line in map(json.loads, f)
+                ]
+            self._by_prompt.setdefault(header.get("prompt", ""), []).append(len(self._recordings))
+            self._recordings.append((header, events))
+
+        if not self._recordings:
+            raise ValueError(f"No recordings (*.jsonl.gz) found in {replay_dir!r}")
+        logger.info("Loaded %d recordings for replay from %s", len(self._recordings), replay_dir)
+
+    def _pick(self, input_data: dict[str, Any]) -> list[tuple[float, BaseEvent]]:
+        if self.match == "prompt":
+            candidates = self._by_prompt.get(_last_user_prompt(input_data))
+            if candidates:
+                return self._recordings[random.choice(candidates)][1]
+        return random.choice(self._recordings)[1]
+
+    async def run_agent(self, input_data: dict[str, Any]) -> AsyncIterator[BaseEvent]:
+        """Yield a recorded event sequence, paced according to ``speed``."""
+        thread_id = input_data.get("thread_id") or input_data.get("threadId")
+        run_id = input_data.get("run_id") or input_data.get("runId")
+        start = time.monotonic()
+
+        for offset, event in self._pick(input_data):
+            if self.speed > 0:
+                delay = offset / self.speed - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if event.type in (EventType.RUN_STARTED, EventType.RUN_FINISHED):
+                # Report the caller's IDs rather than the recorded ones.
+                update = {}
+                if thread_id:
+                    update["thread_id"] = thread_id
+                if run_id:
+                    update["run_id"] = run_id
+                event = event.model_copy(update=update)
+            yield event
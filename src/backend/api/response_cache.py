@@ -0,0 +1,182 @@
+"""Exact-match cache of complete runs for repeated first-turn prompts.
+
+Canned demo prompts and suggestion chips start many threads with the same first
+message under the same shared state. ``ResponseCache`` stores the AG-UI event sequence
+of such runs and replays it for later identical requests, with fresh run, message and
+tool call IDs, instead of running the agent again.
+
+Only first turns (a single user message, no history) are cached. The key is the
+normalized message, the shared state and the client tool names. How long a run may be
+reused depends on the tools it called: each tool has a TTL (``0`` = never cache, e.g.
+``get_current_time``), and the entry lives for the shortest TTL among them. Entries are
+evicted least-recently-used beyond ``max_entries`` or ``max_bytes``.
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from ag_ui.core import BaseEvent, EventType
+
+from utils import logger
+from utils.metrics import meter
+
+_lookup_counter = meter.create_counter(
+    "agui.response_cache.lookups",
+    description="Response cache lookups by outcome (hit, miss, bypass)",
+)
+
+# Event fields holding IDs that must be unique per run
+_ID_FIELDS = ("message_id", "tool_call_id", "parent_message_id")
+
+
+@dataclass
+class _Entry:
+    events: list[BaseEvent]
+    size: int
+    expires: float
+    message_id: str | None  # ID of the user message in the recorded run
+
+
+def _normalize(content: Any) -> str:
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return " ".join(str(content or "").lower().split())
+
+
+def cache_key(input_data: dict[str, Any]) -> str | None:
+    """Key for a first-turn run, or ``None`` if the run must not be cached."""
+    messages = [m for m in input_data.get("messages") or [] if isinstance(m, dict)]
+    if len(messages) != 1 or messages[0].get("role") != "user":
+        return None
+    tools = sorted(t.get("name", "") for t in input_data.get("tools") or [] if isinstance(t, dict))
+    payload = {
+        "message": _normalize(messages[0].get("content")),
+        "state": input_data.get("state") or {},
+        "tools": tools,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def _remap_snapshot(event: BaseEvent, remap: Callable[[str], str], user_message: dict[str, Any]) -> BaseEvent:
+    """Give a MESSAGES_SNAPSHOT the new IDs, with the caller's own user message."""
+    data = event.model_dump(mode="json", exclude_none=True)
+    for message in data.get("messages", []):
+        message["id"] = remap(message["id"])
+        if message.get("tool_call_id"):
+            message["tool_call_id"] = remap(message["tool_call_id"])
+        for call in message.get("tool_calls") or []:
+            call["id"] = remap(call["id"])
+        if message["role"] == "user" and message["id"] == user_message.get("id"):
+            message["content"] = user_message.get("content")
+    return type(event).model_validate(data)
+
+
+class ResponseCache:
+    """LRU + TTL cache of run event sequences, bounded by entry count and bytes."""
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        tool_ttls: dict[str, float] | None = None,
+        max_entries: int = 500,
+        max_bytes: int = 50_000_000,
+    ) -> None:
+        self.ttl = ttl
+        self.tool_ttls = tool_ttls or {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.outcomes: dict[str, int] = {"hit": 0, "miss": 0, "bypass": 0}
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def hit_rate(self) -> float | None:
+        """Hits over cacheable lookups (first turns)."""
+        lookups = self.outcomes["hit"] + self.outcomes["miss"]
+        return self.outcomes["hit"] / lookups if lookups else None
+
+    def run_agent(self, agent: Any, input_data: dict[str, Any]) -> AsyncIterator[BaseEvent]:
+        """Serve the run from the cache, or run ``agent`` and cache the result."""
+        key = cache_key(input_data)
+        if key is None:
+            self._count("bypass")
+            return agent.run_agent(input_data)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self._count("miss")
+            return self._recording(agent.run_agent(input_data), key, input_data["messages"][0].get("id"))
+
+        self._entries.move_to_end(key)
+        self._count("hit")
+        logger.info("Response cache hit (%d events, hit rate %.0f%%)", len(entry.events), self.hit_rate() * 100)
+        return self._replay(entry, input_data)
+
+    async def _recording(
+        self, events: AsyncIterator[BaseEvent], key: str, message_id: str | None
+    ) -> AsyncIterator[BaseEvent]:
+        recorded: list[BaseEvent] = []
+        tools: set[str] = set()
+        finished = False
+        async for event in events:
+            recorded.append(event)
+            if event.type == EventType.TOOL_CALL_START:
+                tools.add(event.tool_call_name)  # type: ignore[attr-defined]
+            elif event.type == EventType.RUN_FINISHED:
+                finished = True
+            elif event.type == EventType.RUN_ERROR:
+                finished = False
+            yield event
+
+        ttl = min([self.ttl, *(self.tool_ttls.get(name, self.ttl) for name in tools)])
+        if finished and ttl > 0:
+            self._store(key, recorded, ttl, message_id)
+
+    def _store(self, key: str, events: list[BaseEvent], ttl: float, message_id: str | None) -> None:
+        size = sum(len(event.model_dump_json(exclude_none=True)) for event in events)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = _Entry(events, size, time.monotonic() + ttl, message_id)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    async def _replay(self, entry: _Entry, input_data: dict[str, Any]) -> AsyncIterator[BaseEvent]:
+        run_ids = {
+            "thread_id": input_data.get("thread_id") or input_data.get("threadId"),
+            "run_id": input_data.get("run_id") or input_data.get("runId"),
+        }
+        user_message = input_data["messages"][0]
+        new_ids: dict[str, str] = {}
+        if entry.message_id and user_message.get("id"):
+            new_ids[entry.message_id] = user_message["id"]
+
+        def remap(value: str) -> str:
+            return new_ids.setdefault(value, str(uuid.uuid4()))
+
+        for event in entry.events:
+            if event.type == EventType.MESSAGES_SNAPSHOT:
+                yield _remap_snapshot(event, remap, user_message)
+                continue
+            update = {name: remap(value) for name in _ID_FIELDS if (value := getattr(event, name, None))}
+            if event.type in (EventType.RUN_STARTED, EventType.RUN_FINISHED):
+                update.update({name: value for name, value in run_ids.items() if value})
+            yield event.model_copy(update=update) if update else event
+
+    def _count(self, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        _lookup_counter.add(1, {"outcome": outcome})
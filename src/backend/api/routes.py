@@ -1,6 +1,9 @@
 """Health check and other API routes."""
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .warmup import warmup
 
 router = APIRouter()
 
@@ -9,3 +12,9 @@ router = APIRouter()
 def health_check():
     """Health check endpoint - no authentication required."""
     return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness_check():
+    """Readiness endpoint - 200 once startup warm-up has finished, 503 until then."""
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
@@ -0,0 +1,63 @@
+"""Start speculative tool prefetches from the AG-UI event stream.
+
+Approval tools such as ``approve_weather_request`` run in the browser: the model's
+call streams out as TOOL_CALL_* events, the run ends, and the client starts a new run
+with the user's answer as a tool message. ``ApprovalWatcher`` starts the approved
+tool's prefetch when such a call goes out, and discards it when the answer that comes
+back is a denial.
+"""
+
+import json
+from typing import TYPE_CHECKING, Any
+
+from ag_ui.core import BaseEvent, ToolCallArgsEvent, ToolCallEndEvent, ToolCallStartEvent
+
+if TYPE_CHECKING:
+    from tools.prefetch import Prefetcher
+
+
+def _loads(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+class ApprovalWatcher:
+    """Per-run watcher; ``approvals`` maps approval tool name to (prefetcher, argument name)."""
+
+    def __init__(self, approvals: dict[str, tuple["Prefetcher", str]]) -> None:
+        self.approvals = approvals
+        self._calls: dict[str, tuple[str, list[str]]] = {}
+
+    def observe_input(self, input_data: dict[str, Any]) -> None:
+        """Discard the prefetches of approvals the user denied (answers in the run input)."""
+        approval_calls: dict[str, str] = {}
+        for message in input_data.get("messages") or []:
+            for call in message.get("toolCalls") or message.get("tool_calls") or []:
+                name = (call.get("function") or {}).get("name")
+                if name in self.approvals:
+                    approval_calls[call.get("id")] = name
+
+            call_id = message.get("toolCallId") or message.get("tool_call_id")
+            if message.get("role") == "tool" and call_id in approval_calls:
+                answer = _loads(message.get("content"))
+                if isinstance(answer, dict) and answer.get("approved") is False:
+                    self.approvals[approval_calls[call_id]][0].discard(call_id)
+
+    def observe(self, event: BaseEvent) -> None:
+        """Start the prefetch once an approval tool call has streamed out completely."""
+        if isinstance(event, ToolCallStartEvent):
+            if event.tool_call_name in self.approvals:
+                self._calls[event.tool_call_id] = (event.tool_call_name, [])
+        elif isinstance(event, ToolCallArgsEvent):
+            if event.tool_call_id in self._calls:
+                self._calls[event.tool_call_id][1].append(event.delta)
+        elif isinstance(event, ToolCallEndEvent) and event.tool_call_id in self._calls:
+            name, chunks = self._calls.pop(event.tool_call_id)
+            prefetcher, arg_name = self.approvals[name]
+            args = _loads("".join(chunks))
+            if isinstance(args, dict) and isinstance(args.get(arg_name), str):
+                prefetcher.start(args[arg_name], call_id=event.tool_call_id)
@@ -0,0 +1,99 @@
+"""Turn full STATE_SNAPSHOT events into STATE_DELTA (JSON Patch) events.
+
+The agent framework emits the whole shared state on every update. For large shared
+documents that is mostly redundant, so the endpoint remembers the last state it sent
+on the current run and sends an RFC 6902 patch instead whenever the patch is smaller.
+The first snapshot of every run (including runs that resume a thread, e.g. after an
+approval) and every ``full_snapshot_every``-th update still go out in full, so a client
+can always resynchronize.
+
+Only ``add``, ``remove`` and ``replace`` operations are produced, which every JSON Patch
+implementation (including ``fast-json-patch`` used by ``@ag-ui/client``) supports.
+"""
+
+import copy
+import json
+from typing import Any
+
+from ag_ui.core import BaseEvent, StateDeltaEvent, StateSnapshotEvent
+
+from utils.metrics import meter
+
+_bytes_saved_counter = meter.create_counter(
+    "agui.state.bytes_saved",
+    unit="By",
+    description="Bytes saved by sending STATE_DELTA instead of STATE_SNAPSHOT",
+)
+
+
+def _escape(token: str) -> str:
+    """Escape a JSON Pointer reference token (RFC 6901)."""
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def json_patch(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """Compute a JSON Patch that turns ``old`` into ``new``.
+
+    Objects are diffed key by key. Lists that only grew get ``add`` operations for
+    the appended items; any other list change replaces the list.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: list[dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(json_patch(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[: len(old)] == old:
+        return [{"op": "add", "path": f"{path}/-", "value": item} for item in new[len(old):]]
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode())
+
+
+class StateDeltaTracker:
+    """Per-run tracker that rewrites state snapshots into deltas when that is cheaper."""
+
+    def __init__(self, full_snapshot_every: int = 10) -> None:
+        self.full_snapshot_every = full_snapshot_every
+        self.snapshot_bytes = 0
+        self.sent_bytes = 0
+        self._last_sent: dict[str, Any] | None = None
+        self._updates_since_full = 0
+
+    def process(self, event: BaseEvent) -> BaseEvent | None:
+        """Return the event to send in place of ``event`` (``None`` to drop a no-op update)."""
+        if not isinstance(event, StateSnapshotEvent) or not isinstance(event.snapshot, dict):
+            return event
+
+        snapshot = event.snapshot
+        full_size = _size(snapshot)
+        self.snapshot_bytes += full_size
+
+        if self._last_sent is not None and self._updates_since_full < self.full_snapshot_every:
+            patch = json_patch(self._last_sent, snapshot)
+            if not patch:
+                return None
+            patch_size = _size(patch)
+            if patch_size < full_size:
+                self._remember(snapshot, full=False)
+                self.sent_bytes += patch_size
+                _bytes_saved_counter.add(full_size - patch_size)
+                return StateDeltaEvent(delta=patch)
+
+        self._remember(snapshot, full=True)
+        self.sent_bytes += full_size
+        return event
+
+    def _remember(self, snapshot: dict[str, Any], full: bool) -> None:
+        self._last_sent = copy.deepcopy(snapshot)
+        self._updates_since_full = 0 if full else self._updates_since_full + 1
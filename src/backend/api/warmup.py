@@ -0,0 +1,80 @@
+"""Startup warm-up and readiness.
+
+The app lifespan runs a list of warm-up steps in the background: building the agent
+stack, opening connection pools, fetching credentials and JWKS, and optionally one
+synthetic agent turn. Each step is timed and logged. ``/ready`` reports ready only
+once every step has finished, while ``/health`` answers from the start. Failed required
+steps are retried in the background, so a transient failure at startup (e.g. Azure not
+reachable yet) does not keep the server unready until it is restarted.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from utils import logger
+
+
+@dataclass
+class WarmUpStep:
+    """One warm-up step. A failing ``required`` step keeps the server not ready until a retry succeeds."""
+
+    name: str
+    run: Callable[[], Awaitable[object]]
+    required: bool = False
+
+
+class WarmUp:
+    """Run warm-up steps in order and track their outcome for ``/ready``."""
+
+    def __init__(self) -> None:
+        self.done = False
+        self.failed = False
+        self.steps: dict[str, dict] = {}
+
+    async def run(self, steps: list[WarmUpStep], timeout: float, retry_interval: float = 10.0) -> None:
+        start = time.perf_counter()
+        failed = [step for step in steps if not await self._run_step(step, timeout) and step.required]
+        self.failed = bool(failed)
+        self.done = True
+        logger.info(
+            "Warm-up %s (took %.3fs)", "failed" if self.failed else "complete", time.perf_counter() - start
+        )
+
+        # Retry failed required steps until they succeed; readiness follows the last attempt.
+        delay = retry_interval
+        while failed:
+            await asyncio.sleep(delay)
+            failed = [step for step in failed if not await self._run_step(step, timeout)]
+            self.failed = bool(failed)
+            if not failed:
+                logger.info("Warm-up recovered, server is ready")
+            delay = min(delay * 2, 300.0)
+
+    async def _run_step(self, step: WarmUpStep, timeout: float) -> bool:
+        attempts = self.steps.get(step.name, {}).get("attempts", 0) + 1
+        self.steps[step.name] = {"status": "running", "attempts": attempts}
+        step_start = time.perf_counter()
+        try:
+            await asyncio.wait_for(step.run(), timeout)
+            status = "ok"
+        except Exception as exc:
+            status = "failed"
+            log = logger.error if step.required else logger.warning
+            log("Warm-up step %s failed: %r", step.name, exc)
+        elapsed = time.perf_counter() - step_start
+        self.steps[step.name] = {"status": status, "ms": round(elapsed * 1000, 1), "attempts": attempts}
+        logger.info("Warm-up step %s: %s (took %.3fs)", step.name, status, elapsed)
+        return status == "ok"
+
+    @property
+    def ready(self) -> bool:
+        return self.done and not self.failed
+
+    def status(self) -> dict:
+        state = "ready" if self.ready else ("failed" if self.failed else "warming_up")
+        return {"status": state, "steps": self.steps}
+
+
+warmup = WarmUp()
@@ -0,0 +1,320 @@
+"""AG-UI over a WebSocket: several runs multiplexed on one connection.
+
+Carries the same AG-UI events as the SSE endpoint, wrapped in JSON text frames.
+
+Client -> server:
+
+- ``{"type": "auth", "token": "..."}``: authenticate (first message, unless the
+  handshake had an ``Authorization: Bearer`` header) or refresh the token
+- ``{"type": "run", "input": {...}}``: start a run; ``input`` is the AG-UI run input
+  that would be POSTed to ``/``, and its ``run_id`` identifies the run's frames
+- ``{"type": "cancel", "run_id": "..."}``: stop a run
+
+Server -> client:
+
+- ``{"type": "ready", "user": "..."}``: authenticated, runs can be started
+- ``{"type": "event", "run_id": "...", "event": {...}}``: one AG-UI event
+- ``{"type": "run_end", "run_id": "...", "cancelled": false}``: the run has ended and
+  no longer counts against the connection's run limit
+- ``{"type": "error", "run_id": "...", "message": "..."}``: a rejected message or a
+  failed run (``run_id`` is omitted when not about a run)
+- ``{"type": "auth_expired"}``: the token expired without a refresh; the connection is
+  closed with code 4401
+
+A rejected token closes the connection with 4401, a missing ``auth`` message with 4408.
+If the token cannot be checked at all (e.g. the signing keys cannot be fetched) an
+``error`` frame is sent and the connection is closed with 1008.
+
+Tokens are validated once per connection and again on every refresh, instead of once
+per request. All frames go through one send queue per connection, drained by a single
+writer. Run frames need one of ``queue_size`` slots: when the client reads slower than
+the runs produce, the slots run out and the runs wait, which pauses their agent streams
+(backpressure) instead of buffering without limit. Control frames (errors, auth) skip
+the slots so the reader never waits on a slow client; beyond ``MAX_PENDING_CONTROL``
+unsent ones they are dropped and counted.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import jwt
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+from utils import logger
+
+# Close codes (4000-4999 are reserved for applications)
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_AUTH_TIMEOUT = 4408
+
+# Unsent control frames kept per connection before further ones are dropped
+MAX_PENDING_CONTROL = 64
+
+RunEvents = Callable[[dict[str, Any], str], AsyncIterator[str]]
+TokenValidator = Callable[[str], Awaitable[dict]]
+
+
+def _bearer_token(authorization: str | None) -> str | None:
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return authorization[7:].strip().split(",", 1)[0].strip().split(" ", 1)[0].strip() or None
+
+
+def _user(claims: dict) -> str:
+    return claims.get("oid") or claims.get("sub") or "anonymous"
+
+
+class WebSocketConnection:
+    """Serve one WebSocket connection until the client disconnects.
+
+    Args:
+        websocket: The not yet accepted connection.
+        run_events: Produces the AG-UI events of one run, serialized as JSON, from its
+            input and the user.
+        validate_token: Validates a bearer token and returns its claims; ``None``
+            disables authentication.
+        max_runs: Maximum number of concurrent runs on the connection.
+        queue_size: Run frames buffered per connection before runs are paused.
+        auth_timeout: Seconds a client has to authenticate after connecting.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        run_events: RunEvents,
+        validate_token: TokenValidator | None = None,
+        max_runs: int = 4,
+        queue_size: int = 256,
+        auth_timeout: float = 10.0,
+    ) -> None:
+        self.websocket = websocket
+        self.run_events = run_events
+        self.validate_token = validate_token
+        self.max_runs = max_runs
+        self.auth_timeout = auth_timeout
+        self.user = "anonymous"
+        self.expires_at: float | None = None
+        self.runs_started = 0
+        self.frames_sent = 0
+        self.backpressure_waits = 0
+        self.control_dropped = 0
+        # (frame, is_run_frame); run frames hold a slot until they are sent
+        self._queue: asyncio.Queue[tuple[str, bool]] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(queue_size)
+        self._pending_control = 0
+        self._auth_changed = asyncio.Event()
+        self._runs: dict[str, asyncio.Task] = {}
+        self._closing = False
+
+    async def serve(self) -> None:
+        await self.websocket.accept()
+        if not await self._authenticate():
+            return
+
+        opened = time.monotonic()
+        await self.websocket.send_text(json.dumps({"type": "ready", "user": self.user}))
+        tasks = [
+            asyncio.create_task(self._reader()),
+            asyncio.create_task(self._writer()),
+            asyncio.create_task(self._watch_expiry()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._closing = True
+            runs = list(self._runs.values())
+            for task in [*tasks, *runs]:
+                task.cancel()
+            await asyncio.gather(*tasks, *runs, return_exceptions=True)
+            logger.info(
+                "WebSocket closed user=%s runs=%d frames=%d backpressure_waits=%d control_dropped=%d "
+                "duration=%.1fs",
+                self.user,
+                self.runs_started,
+                self.frames_sent,
+                self.backpressure_waits,
+                self.control_dropped,
+                time.monotonic() - opened,
+            )
+
+    # Authentication
+
+    async def _authenticate(self) -> bool:
+        if self.validate_token is None:
+            return True
+
+        token = _bearer_token(self.websocket.headers.get("authorization"))
+        if token is None:
+            try:
+                message = await asyncio.wait_for(self.websocket.receive_json(), self.auth_timeout)
+            except asyncio.TimeoutError:
+                await self._close(CLOSE_AUTH_TIMEOUT, "Authentication timed out")
+                return False
+            except (WebSocketDisconnect, ValueError):
+                return False
+            if not isinstance(message, dict) or message.get("type") != "auth" or not message.get("token"):
+                await self._close(CLOSE_UNAUTHORIZED, "Missing authentication credentials")
+                return False
+            token = message["token"]
+
+        try:
+            claims = await self.validate_token(token)
+        except HTTPException as e:
+            await self._close(CLOSE_UNAUTHORIZED, str(e.detail))
+            return False
+        except jwt.PyJWTError as e:
+            # JWKS fetch or key errors that the validator does not map to an HTTPException
+            logger.warning("WebSocket authentication failed: %r", e)
+            await self.websocket.send_text(json.dumps({"type": "error", "message": "Authentication failed"}))
+            await self._close(CLOSE_POLICY_VIOLATION, "Authentication failed")
+            return False
+        self._accept_claims(claims)
+        return True
+
+    async def _reauthenticate(self, token: str) -> None:
+        if self.validate_token is None:
+            return
+        try:
+            claims = await self.validate_token(token)
+        except HTTPException as e:
+            self._send_control({"type": "error", "message": f"Token refresh failed: {e.detail}"})
+            return
+        except jwt.PyJWTError as e:
+            # The current token stays valid until it expires, so keep the connection.
+            logger.warning("WebSocket token refresh failed: %r", e)
+            self._send_control({"type": "error", "message": "Token refresh failed"})
+            return
+        if _user(claims) != self.user:
+            self._send_control({"type": "error", "message": "Token refresh must be for the same user"})
+            return
+        self._accept_claims(claims)
+
+    def _accept_claims(self, claims: dict) -> None:
+        self.user = _user(claims)
+        exp = claims.get("exp")
+        self.expires_at = float(exp) if exp is not None else None
+        self._auth_changed.set()
+
+    async def _watch_expiry(self) -> None:
+        """Close the connection once the token expires, unless it is refreshed first.
+
+        Runs for every authenticated connection and re-reads the expiry after each
+        refresh, so a refreshed token that adds (or drops) ``exp`` is handled too.
+        """
+        while self.validate_token is not None:
+            expires_at = self.expires_at
+            if expires_at is not None and expires_at <= time.time():
+                break
+            self._auth_changed.clear()
+            try:
+                timeout = None if expires_at is None else expires_at - time.time()
+                await asyncio.wait_for(self._auth_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.Future()  # No authentication: never expires
+        logger.info("WebSocket token expired user=%s", self.user)
+        self._send_control({"type": "auth_expired"})
+        # Give the writer a moment to deliver the notice, then close regardless.
+        for _ in range(50):
+            if not self._pending_control:
+                break
+            await asyncio.sleep(0.02)
+        await self._close(CLOSE_UNAUTHORIZED, "Token has expired")
+
+    # Reading
+
+    async def _reader(self) -> None:
+        while True:
+            try:
+                message = await self.websocket.receive_json()
+            except WebSocketDisconnect:
+                return
+            except ValueError:
+                self._send_control({"type": "error", "message": "Frames must be JSON"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            if kind == "run":
+                await self._start_run(message.get("input"))
+            elif kind == "cancel":
+                task = self._runs.get(str(message.get("run_id")))
+                if task is not None:
+                    task.cancel()
+            elif kind == "auth" and message.get("token"):
+                await self._reauthenticate(message["token"])
+            else:
+                self._send_control({"type": "error", "message": f"Unknown message type: {kind!r}"})
+
+    async def _start_run(self, input_data: Any) -> None:
+        if not isinstance(input_data, dict):
+            self._send_control({"type": "error", "message": "A run needs an input object"})
+            return
+        run_id = input_data.get("run_id") or input_data.get("runId")
+        if not run_id:
+            self._send_control({"type": "error", "message": "A run needs an input with a run_id"})
+            return
+        run_id = str(run_id)
+        if run_id in self._runs:
+            self._send_control({"type": "error", "run_id": run_id, "message": "Run is already active"})
+            return
+        if len(self._runs) >= self.max_runs:
+            self._send_control(
+                {"type": "error", "run_id": run_id, "message": f"At most {self.max_runs} concurrent runs"}
+            )
+            return
+        self.runs_started += 1
+        self._runs[run_id] = asyncio.create_task(self._run(run_id, input_data))
+
+    async def _run(self, run_id: str, input_data: dict[str, Any]) -> None:
+        # Events arrive serialized and go straight into the frame (no second JSON pass).
+        prefix = f'{{"type":"event","run_id":{json.dumps(run_id)},"event":'
+        cancelled = False
+        try:
+            async for event in self.run_events(input_data, self.user):
+                await self._enqueue(prefix + event + "}")
+        except asyncio.CancelledError:
+            if self._closing:
+                raise
+            cancelled = True
+        except Exception as e:
+            logger.error("WebSocket run failed run_id=%s: %s", run_id, e)
+            await self._enqueue(json.dumps({"type": "error", "run_id": run_id, "message": "Run failed"}))
+        finally:
+            self._runs.pop(run_id, None)
+        await self._enqueue(json.dumps({"type": "run_end", "run_id": run_id, "cancelled": cancelled}))
+
+    # Writing
+
+    async def _enqueue(self, frame: str) -> None:
+        """Queue a run frame, waiting for a free slot (backpressure)."""
+        if self._slots.locked():
+            self.backpressure_waits += 1
+        await self._slots.acquire()
+        self._queue.put_nowait((frame, True))
+
+    def _send_control(self, message: dict[str, Any]) -> None:
+        """Queue a control frame without waiting; dropped if too many are unsent."""
+        if self._pending_control >= MAX_PENDING_CONTROL:
+            self.control_dropped += 1
+            return
+        self._pending_control += 1
+        self._queue.put_nowait((json.dumps(message), False))
+
+    async def _writer(self) -> None:
+        while True:
+            frame, is_run = await self._queue.get()
+            await self.websocket.send_text(frame)
+            if is_run:
+                self._slots.release()
+            else:
+                self._pending_control -= 1
+            self.frames_sent += 1
+
+    async def _close(self, code: int, reason: str) -> None:
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except RuntimeError:
+            pass  # Already closed
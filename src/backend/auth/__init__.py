@@ -1,12 +1,12 @@
 """Authentication module for Entra ID token validation."""
 
-from .entra import validate_token, get_jwks_keys
+from .entra import validate_token, warm_up_signing_keys
 from .models import get_current_user, security_scheme
 from .middleware import authentication_middleware
 
 __all__ = [
     "validate_token",
-    "get_jwks_keys",
+    "warm_up_signing_keys",
     "get_current_user",
     "security_scheme",
     "authentication_middleware",
@@ -1,41 +1,38 @@
 """Entra ID token validation and JWKS management."""
 
+import asyncio
 import time
-import httpx
+from typing import Any
+from urllib.parse import urlparse
+
 import jwt
 from fastapi import HTTPException
+from opentelemetry.trace import SpanKind
 
-from config import ENTRA_TENANT_ID, JWKS_CACHE_DURATION
+from config import ENTRA_TENANT_ID
 from utils import logger
+from utils.tracing import tracer
 
 # Prefer PyJWT's built-in JWKS client for key selection. It handles fetching
 # and picking the correct key for a given JWT (kid) reliably.
 from jwt import PyJWKClient
 
-# Cache for JWKS keys
-_jwks_cache: dict = {}
-_jwks_cache_time: float = 0
-
 # Cache PyJWKClient instance
 _jwk_client: PyJWKClient | None = None
 _jwk_client_tenant: str = ""
 
-async def get_jwks_keys() -> dict:
-    """Fetch and cache Microsoft's JWKS keys asynchronously."""
-    global _jwks_cache, _jwks_cache_time
-    
-    if _jwks_cache and (time.time() - _jwks_cache_time) < JWKS_CACHE_DURATION:
-        return _jwks_cache
-    
-    jwks_url = f"https://login.microsoftonline.com/{ENTRA_TENANT_ID}/discovery/v2.0/keys"
-    
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(jwks_url)
-        response.raise_for_status()
-        _jwks_cache = response.json()
-        _jwks_cache_time = time.time()
-        logger.info("Fetched JWKS keys from Microsoft")
-        return _jwks_cache
+
+class _TracedJWKClient(PyJWKClient):
+    """PyJWKClient whose JWKS downloads get a client span (it uses urllib, not httpx)."""
+
+    def fetch_data(self) -> Any:
+        host = urlparse(self.uri).hostname
+        with tracer.start_as_current_span(
+            f"HTTP GET {host}",
+            kind=SpanKind.CLIENT,
+            attributes={"http.request.method": "GET", "server.address": host, "url.full": self.uri},
+        ):
+            return super().fetch_data()
 
 
 async def get_signing_key(token: str) -> str:
@@ -48,15 +45,32 @@ async def get_signing_key(token: str) -> str:
     jwks_url = f"https://login.microsoftonline.com/{ENTRA_TENANT_ID}/discovery/v2.0/keys"
 
     if _jwk_client is None or _jwk_client_tenant != ENTRA_TENANT_ID:
-        _jwk_client = PyJWKClient(jwks_url, cache_keys=True, timeout=10)
+        _jwk_client = _TracedJWKClient(jwks_url, cache_keys=True, timeout=10)
         _jwk_client_tenant = ENTRA_TENANT_ID
 
     signing_key = _jwk_client.get_signing_key_from_jwt(token).key
     return signing_key
 
 
+async def warm_up_signing_keys() -> None:
+    """Fetch the JWKS used for token validation before the first authenticated request."""
+    global _jwk_client, _jwk_client_tenant
+
+    jwks_url = f"https://login.microsoftonline.com/{ENTRA_TENANT_ID}/discovery/v2.0/keys"
+    if _jwk_client is None or _jwk_client_tenant != ENTRA_TENANT_ID:
+        _jwk_client = _TracedJWKClient(jwks_url, cache_keys=True, timeout=10)
+        _jwk_client_tenant = ENTRA_TENANT_ID
+    keys = await asyncio.to_thread(_jwk_client.get_signing_keys)
+    logger.info("Fetched %d JWKS signing keys", len(keys))
+
+
 async def validate_token(token: str) -> dict:
     """Validate an Entra ID token and return the claims."""
+    with tracer.start_as_current_span("auth.validate_token"):
+        return await _validate_token(token)
+
+
+async def _validate_token(token: str) -> dict:
     from config import ENTRA_AUDIENCE, ENTRA_TENANT_ID
     
     try:
@@ -88,7 +102,7 @@ async def validate_token(token: str) -> dict:
             if time.time() < nbf:
                 raise ValueError("Token not yet valid (nbf claim)")
         
-        logger.info(f"✅ Token validated for user: {claims.get('preferred_username', claims.get('sub', 'unknown'))}")
+        logger.info("✅ Token validated for user: %s", claims.get("preferred_username", claims.get("sub", "unknown")))
         return claims
         
     except jwt.ExpiredSignatureError:
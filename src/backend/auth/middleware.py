@@ -8,9 +8,9 @@ from .entra import validate_token
 
 
 async def authentication_middleware(request, call_next):
-    """Middleware to enforce authentication on all endpoints except health checks and OPTIONS."""
-    # Skip auth for health checks and OPTIONS requests
-    if request.url.path == "/health" or request.method == "OPTIONS":
+    """Middleware to enforce authentication on all endpoints except health/readiness checks and OPTIONS."""
+    # Skip auth for health/readiness checks and OPTIONS requests
+    if request.url.path in ("/health", "/ready") or request.method == "OPTIONS":
         return await call_next(request)
     
     # Skip if Entra ID not configured
@@ -32,7 +32,8 @@ async def authentication_middleware(request, call_next):
     token = token.strip().split(",", 1)[0].strip().split(" ", 1)[0].strip()
     
     try:
-        await validate_token(token)
+        # Keep the claims for per-user accounting downstream
+        request.state.claims = await validate_token(token)
         return await call_next(request)
     except HTTPException as e:
         return JSONResponse(
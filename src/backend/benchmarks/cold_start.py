@@ -0,0 +1,149 @@
+"""Benchmark: import time and cold start of the backend.
+
+Measures, each in a fresh interpreter:
+
+- how long ``import api`` takes (the cost paid before uvicorn can serve anything)
+- how long a freshly started server takes to answer ``GET /health``, and until
+  ``GET /ready`` reports the agent stack built (network warm-up steps are disabled)
+
+and lists the slowest modules from ``python -X importtime``. With ``--max-import-ms``
+/ ``--max-health-ms`` the script exits non-zero when a budget is exceeded, so CI can
+catch regressions such as a heavy module imported at the top of ``api``.
+
+The server is started with placeholder Azure OpenAI settings (including an API key,
+so no Entra token is fetched) when none are set; with network warm-up disabled the
+agent stack is built without network calls.
+
+Usage:
+    uv run python benchmarks/cold_start.py [--runs 5] [--max-import-ms 1500] [--json cold-start.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("AZURE_OPENAI_ENDPOINT", "https://placeholder.openai.azure.com/")
+    env.setdefault("AZURE_OPENAI_DEPLOYMENT_NAME", "placeholder")
+    env.setdefault("AZURE_OPENAI_API_KEY", "placeholder")  # skip the Entra token fetch at client creation
+    env.setdefault("LOOP_MONITOR_ENABLED", "false")
+    env.setdefault("WARMUP_ENABLED", "false")
+    return env
+
+
+def measure_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list[tuple[str, float]]:
+    """Top modules by cumulative import time (ms) from ``-X importtime``."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api"],
+        cwd=BACKEND_DIR, env=_env(), check=True, capture_output=True, text=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((name, int(cumulative) / 1000))
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(proc: subprocess.Popen, port: int, path: str, start: float, timeout: float) -> float:
+    while time.perf_counter() - start < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1.0).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{path} did not answer within {timeout}s")
+
+
+def measure_startup(timeout: float = 60.0) -> tuple[float, float]:
+    """Start a server and return the seconds until /health and /ready answer 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        return _wait_for(proc, port, "/health", start, timeout), _wait_for(proc, port, "/ready", start, timeout)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--max-health-ms", type=float, help="fail if the median time to /health exceeds this")
+    parser.add_argument("--max-ready-ms", type=float, help="fail if the median time to /ready exceeds this")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    imports = [measure_import() * 1000 for _ in range(args.runs)]
+    startups = [measure_startup() for _ in range(args.runs)]
+    health = [h * 1000 for h, _ in startups]
+    ready = [r * 1000 for _, r in startups]
+    report = {
+        "import_ms": {"median": round(statistics.median(imports), 1), "min": round(min(imports), 1)},
+        "health_ms": {"median": round(statistics.median(health), 1), "min": round(min(health), 1)},
+        "ready_ms": {"median": round(statistics.median(ready), 1), "min": round(min(ready), 1)},
+        "slowest_imports_ms": dict(slowest_imports(args.top)),
+    }
+
+    print(f"import api      median={report['import_ms']['median']:8.1f}ms  min={report['import_ms']['min']:8.1f}ms")
+    print(f"time to /health median={report['health_ms']['median']:8.1f}ms  min={report['health_ms']['min']:8.1f}ms")
+    print(f"time to /ready  median={report['ready_ms']['median']:8.1f}ms  min={report['ready_ms']['min']:8.1f}ms")
+    print("\nslowest imports (cumulative):")
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"  {ms:8.1f}ms  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if args.max_import_ms and report["import_ms"]["median"] > args.max_import_ms:
+        print(f"\nFAIL: import time {report['import_ms']['median']}ms exceeds budget {args.max_import_ms}ms")
+        failed = True
+    if args.max_health_ms and report["health_ms"]["median"] > args.max_health_ms:
+        print(f"\nFAIL: time to /health {report['health_ms']['median']}ms exceeds budget {args.max_health_ms}ms")
+        failed = True
+    if args.max_ready_ms and report["ready_ms"]["median"] > args.max_ready_ms:
+        print(f"\nFAIL: time to /ready {report['ready_ms']['median']}ms exceeds budget {args.max_ready_ms}ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Local fake Open-Meteo upstream with configurable errors and latency.
+
+Serves ``/v1/search`` (geocoding) and ``/v1/forecast`` with canned responses. Each
+request fails with a 503 with probability ``--error-rate``, takes ``--latency`` ms
+(plus ``--tail-latency`` ms for a ``--tail-rate`` fraction of requests), and with
+``--down`` every request fails. Point the weather tool at it with:
+
+    WEATHER_GEOCODE_URL=http://127.0.0.1:8999/v1/search
+    WEATHER_FORECAST_URL=http://127.0.0.1:8999/v1/forecast
+
+Usage:
+    uv run python benchmarks/fake_upstream.py [--port 8999] [--error-rate 0.2] [--latency 50]
+        [--tail-rate 0.05 --tail-latency 3000] [--down]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+GEOCODE = {"results": [{"name": "Brussels", "country": "Belgium", "latitude": 50.85, "longitude": 4.35}]}
+FORECAST = {
+    "current": {"temperature_2m": 14.2, "relative_humidity_2m": 71, "wind_speed_10m": 12.5, "weather_code": 2}
+}
+
+
+@dataclass
+class Scenario:
+    error_rate: float = 0.0
+    latency: float = 0.0  # ms
+    tail_rate: float = 0.0
+    tail_latency: float = 0.0  # ms
+    down: bool = False
+
+
+class FakeUpstream:
+    """Threaded fake upstream; change ``scenario`` at any time to switch behavior."""
+
+    def __init__(self, port: int = 0, scenario: Scenario | None = None) -> None:
+        self.scenario = scenario or Scenario()
+        self.requests = 0
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                upstream.requests += 1
+                scenario = upstream.scenario
+                delay = scenario.latency
+                if random.random() < scenario.tail_rate:
+                    delay += scenario.tail_latency
+                time.sleep(delay / 1000)
+
+                path = urlsplit(self.path).path
+                if scenario.down or random.random() < scenario.error_rate:
+                    self._send(503, {"error": True, "reason": "fake outage"})
+                elif path == "/v1/search":
+                    self._send(200, GEOCODE)
+                elif path == "/v1/forecast":
+                    self._send(200, FORECAST)
+                else:
+                    self._send(404, {"error": True, "reason": "not found"})
+
+            def _send(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client gave up (timeout or hedge winner)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "FakeUpstream":
+        threading.Thread(target=self.server.serve_forever, name="fake-upstream", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that get a 503")
+    parser.add_argument("--latency", type=float, default=0.0, help="base latency in ms")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of requests with extra latency")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="extra latency in ms for the tail")
+    parser.add_argument("--down", action="store_true", help="fail every request")
+    args = parser.parse_args()
+
+    scenario = Scenario(args.error_rate, args.latency, args.tail_rate, args.tail_latency, args.down)
+    upstream = FakeUpstream(args.port, scenario)
+    print(f"Fake upstream on {upstream.base_url} ({scenario})")
+    try:
+        upstream.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
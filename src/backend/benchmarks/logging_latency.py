@@ -0,0 +1,99 @@
+"""Benchmark: event-loop latency while logging to a slow stdout.
+
+Simulates a streaming run that logs one record per event while stdout is slow
+(as under a back-pressured Docker log driver), and measures how late a 1 ms
+heartbeat task wakes up. Compares loggers from ``utils.logging.get_logger`` with
+the queue disabled (every write on the event loop) and enabled. A root handler is
+installed the way ``logging.basicConfig()`` in agent_framework does, to check that
+application records are not also written there.
+
+Usage:
+    uv run python benchmarks/logging_latency.py [--events 2000] [--write-delay-ms 2]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.logging as app_logging  # noqa: E402
+from utils.logging import Truncated, get_logger, shutdown_logging  # noqa: E402
+
+
+class SlowStream(io.TextIOBase):
+    """A stream whose writes block for a fixed time."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        self.writes += 1
+        return len(text)
+
+
+async def _measure(log: logging.Logger, events: int) -> list[float]:
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def heartbeat() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    async def stream() -> None:
+        payload = "x" * 5000
+        for i in range(events):
+            log.info("event %d result=%s", i, Truncated(payload, 200))
+            await asyncio.sleep(0)
+        done.set()
+
+    await asyncio.gather(heartbeat(), stream())
+    return lags
+
+
+def _report(label: str, lags: list[float], elapsed: float) -> None:
+    lags = sorted(lags)
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{label:<10} run={elapsed:7.3f}s  loop lag mean={statistics.fmean(lags):7.3f}ms  "
+        f"p99={p99:7.3f}ms  max={lags[-1]:7.3f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--write-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    stream = SlowStream(args.write_delay_ms / 1000)
+    app_logging._stdout_handler.setStream(stream)
+    root_stream = SlowStream(args.write_delay_ms / 1000)
+    logging.basicConfig(stream=root_stream)
+
+    # Queue disabled: every write happens on the event loop.
+    app_logging.LOG_QUEUE_ENABLED = False
+    start = time.perf_counter()
+    lags = asyncio.run(_measure(get_logger("bench.sync"), args.events))
+    _report("sync", lags, time.perf_counter() - start)
+
+    # Queue enabled: writes happen on the listener thread.
+    app_logging.LOG_QUEUE_ENABLED = True
+    start = time.perf_counter()
+    lags = asyncio.run(_measure(get_logger("bench.queued"), args.events))
+    _report("queued", lags, time.perf_counter() - start)
+    shutdown_logging()
+
+    print(f"records written: app handler={stream.writes}  root handler={root_stream.writes}")
+
+if __name__ == "__main__":
+    main()
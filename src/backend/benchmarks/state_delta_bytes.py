@@ -0,0 +1,71 @@
+"""Benchmark: shared-state bytes per run with STATE_DELTA vs full snapshots.
+
+Simulates runs whose shared state is a growing document (a list of paragraphs plus
+the user's preferences) that the agent updates once per step, and reports how many
+state bytes go over the wire when every update is a full STATE_SNAPSHOT versus when
+``StateDeltaTracker`` rewrites updates into JSON Patch deltas.
+
+Usage:
+    uv run python benchmarks/state_delta_bytes.py [--runs 5] [--updates 40] [--full-every 10]
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ag_ui.core import StateSnapshotEvent  # noqa: E402
+
+from api.state_delta import StateDeltaTracker  # noqa: E402
+
+WORDS = "the quick brown fox jumps over a lazy dog while the moon rises slowly".split()
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 80)))
+
+
+def _run(rng: random.Random, updates: int, full_every: int) -> tuple[int, int]:
+    state = {"language": "English", "style": "Casual", "document": {"title": "Draft", "paragraphs": []}}
+    tracker = StateDeltaTracker(full_every)
+    for step in range(updates):
+        paragraphs = state["document"]["paragraphs"]
+        if paragraphs and rng.random() < 0.3:
+            paragraphs[rng.randrange(len(paragraphs))] = _paragraph(rng)
+        else:
+            paragraphs.append(_paragraph(rng))
+        if rng.random() < 0.05:
+            state["style"] = rng.choice(["Casual", "Formal", "Playful"])
+        state["document"]["title"] = f"Draft v{step + 1}"
+        tracker.process(StateSnapshotEvent(snapshot=state))
+    return tracker.snapshot_bytes, tracker.sent_bytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=40, help="state updates per run")
+    parser.add_argument("--full-every", type=int, default=10, help="send a full snapshot every N updates")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    total_full = total_sent = 0
+    for run in range(1, args.runs + 1):
+        full, sent = _run(rng, args.updates, args.full_every)
+        total_full += full
+        total_sent += sent
+        print(
+            f"run {run:<3} snapshots={full:>9,d}B  deltas={sent:>9,d}B  "
+            f"saved={full - sent:>9,d}B ({(full - sent) / full:6.1%})"
+        )
+    print(
+        f"{'total':<7} snapshots={total_full:>9,d}B  deltas={total_sent:>9,d}B  "
+        f"saved per run={(total_full - total_sent) // args.runs:>9,d}B ({(total_full - total_sent) / total_full:6.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
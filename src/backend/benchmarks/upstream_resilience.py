@@ -0,0 +1,99 @@
+"""Benchmark: weather lookups against a flaky local upstream, plain vs resilient HTTP.
+
+Starts ``fake_upstream.FakeUpstream`` in-process and runs the weather tool's two
+requests (geocode, then forecast) through three clients, scenario by scenario:
+
+- ``plain``: one ``httpx.Client`` with a 10 s timeout and no retries (the old tool)
+- ``resilient``: ``ResilientHttp`` with the default policy
+- ``hedged``: ``ResilientHttp`` that hedges requests slower than ``--hedge-after``
+
+Scenarios run in order on the same client, so the ``outage`` scenario shows the circuit
+breaker failing fast and serving cached responses from the earlier scenarios.
+
+Usage:
+    uv run python benchmarks/upstream_resilience.py [--lookups 100] [--hedge-after 0.3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from benchmarks.fake_upstream import FakeUpstream, Scenario  # noqa: E402
+from tools.http_client import ResilientHttp  # noqa: E402
+
+SCENARIOS = {
+    "healthy": Scenario(latency=20),
+    "flaky_20pct": Scenario(latency=20, error_rate=0.2),
+    "slow_tail_5pct": Scenario(latency=20, tail_rate=0.05, tail_latency=3000),
+    "outage": Scenario(down=True),
+}
+
+
+class PlainHttp:
+    """The tool's previous behavior: one shared client, no retries."""
+
+    def __init__(self) -> None:
+        self.client = httpx.Client(timeout=10.0)
+
+    def get_json(self, url: str, params: dict) -> dict:
+        response = self.client.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+
+def _lookup(http, base_url: str) -> None:
+    geo = http.get_json(f"{base_url}/v1/search", {"name": "Brussels", "count": 1, "format": "json"})
+    place = geo["results"][0]
+    http.get_json(f"{base_url}/v1/forecast", {"latitude": place["latitude"], "longitude": place["longitude"]})
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=100, help="weather lookups per scenario")
+    parser.add_argument("--hedge-after", type=float, default=0.3, help="hedge delay in seconds")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream().start()
+    clients = {
+        "plain": PlainHttp(),
+        "resilient": ResilientHttp(),
+        "hedged": ResilientHttp(hedge_after=args.hedge_after),
+    }
+
+    print(f"{'client':<10} {'scenario':<15} {'ok':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'upstream':>9}")
+    for name, http in clients.items():
+        for scenario_name, scenario in SCENARIOS.items():
+            upstream.scenario = scenario
+            before = upstream.requests
+            latencies: list[float] = []
+            ok = 0
+            for _ in range(args.lookups):
+                start = time.perf_counter()
+                try:
+                    _lookup(http, upstream.base_url)
+                    ok += 1
+                except Exception:
+                    pass
+                latencies.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{name:<10} {scenario_name:<15} {ok / args.lookups:>6.0%} {_percentile(latencies, 50):>8.0f} "
+                f"{_percentile(latencies, 95):>8.0f} {max(latencies):>8.0f} {upstream.requests - before:>9}"
+            )
+        if isinstance(http, ResilientHttp):
+            print(f"{'':<10} outcomes: {dict(http.outcomes)}")
+
+    upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark: turns/sec and per-turn overhead, SSE endpoint vs WebSocket endpoint.
+
+Starts the server in replay mode (``AGUI_REPLAY_SPEED=0``) on a synthetic recording
+(one text message of ``--chunks`` deltas), so the measured time is transport and
+pipeline overhead only, and plays ``--turns`` turns with ``--concurrency`` in flight:
+
+- ``sse-new``: ``POST /`` on a new HTTP connection per turn
+- ``sse-pooled``: ``POST /`` over one pooled keep-alive client
+- ``ws``: runs multiplexed over one WebSocket connection
+
+Authentication is off (no Entra settings), so the per-request token validation the
+WebSocket endpoint saves is not part of the numbers.
+
+Usage:
+    uv run python benchmarks/ws_vs_sse.py [--turns 500] [--concurrency 4] [--chunks 50]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _write_recording(replay_dir: str, chunks: int) -> None:
+    events = [
+        {"type": "RUN_STARTED", "threadId": "t", "runId": "r"},
+        {"type": "TEXT_MESSAGE_START", "messageId": "m", "role": "assistant"},
+        *({"type": "TEXT_MESSAGE_CONTENT", "messageId": "m", "delta": f"word{i} "} for i in range(chunks)),
+        {"type": "TEXT_MESSAGE_END", "messageId": "m"},
+        {"type": "RUN_FINISHED", "threadId": "t", "runId": "r"},
+    ]
+    with gzip.open(os.path.join(replay_dir, "synthetic.jsonl.gz"), "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"input": {}, "prompt": "", "recorded_at": time.time()}) + "\n")
+        for event in events:
+            f.write(json.dumps({"t": 0, "event": event}) + "\n")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(replay_dir: str, port: int, concurrency: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "AGUI_REPLAY_DIR": replay_dir,
+        "AGUI_REPLAY_SPEED": "0",
+        "ENTRA_TENANT_ID": "",
+        "ENTRA_AUDIENCE": "",
+        "LOOP_MONITOR_ENABLED": "false",
+        "WARMUP_ENABLED": "false",
+        "WS_MAX_RUNS_PER_CONNECTION": str(concurrency),
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning",
+         "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0).status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    proc.terminate()
+    raise TimeoutError("server did not become ready")
+
+
+def _run_input() -> dict:
+    return {
+        "thread_id": str(uuid.uuid4()),
+        "run_id": str(uuid.uuid4()),
+        "messages": [{"id": str(uuid.uuid4()), "role": "user", "content": "Hello"}],
+        "state": {"language": "en", "style": "regular"},
+        "tools": [],
+        "context": [],
+        "forwarded_props": {},
+    }
+
+
+async def _sse_turn(client: httpx.AsyncClient, url: str) -> int:
+    received = 0
+    async with client.stream("POST", url, json=_run_input()) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            received += len(line) + 1
+            if line.startswith("data:") and '"RUN_FINISHED"' in line:
+                break
+    return received
+
+
+async def _play(turn, turns: int, concurrency: int) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    received = 0
+    remaining = iter(range(turns))
+
+    async def worker() -> None:
+        nonlocal received
+        for _ in remaining:
+            start = time.perf_counter()
+            size = await turn()
+            latencies.append((time.perf_counter() - start) * 1000)
+            received += size
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, received
+
+
+async def bench_sse(base_url: str, turns: int, concurrency: int, pooled: bool) -> tuple[list[float], int]:
+    limits = httpx.Limits(max_connections=concurrency)
+    if pooled:
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            return await _play(lambda: _sse_turn(client, f"{base_url}/"), turns, concurrency)
+
+    async def fresh_turn() -> int:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return await _sse_turn(client, f"{base_url}/")
+
+    return await _play(fresh_turn, turns, concurrency)
+
+
+async def bench_ws(ws_url: str, turns: int, concurrency: int) -> tuple[list[float], int]:
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        ready = json.loads(await ws.recv())
+        assert ready["type"] == "ready", ready
+        pending: dict[str, asyncio.Future] = {}
+        received: dict[str, int] = {}
+
+        async def dispatch() -> None:
+            async for frame in ws:
+                message = json.loads(frame)
+                run_id = message.get("run_id")
+                received[run_id] = received.get(run_id, 0) + len(frame)
+                if message["type"] == "run_end":
+                    pending.pop(run_id).set_result(received.pop(run_id))
+                elif message["type"] == "error":
+                    raise RuntimeError(message)
+
+        async def turn() -> int:
+            input_data = _run_input()
+            done = asyncio.get_running_loop().create_future()
+            pending[input_data["run_id"]] = done
+            await ws.send(json.dumps({"type": "run", "input": input_data}))
+            return await done
+
+        dispatcher = asyncio.create_task(dispatch())
+        try:
+            return await _play(turn, turns, concurrency)
+        finally:
+            dispatcher.cancel()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run(args: argparse.Namespace, port: int) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    benches = {
+        "sse-new": lambda: bench_sse(base_url, args.turns, args.concurrency, pooled=False),
+        "sse-pooled": lambda: bench_sse(base_url, args.turns, args.concurrency, pooled=True),
+        "ws": lambda: bench_ws(f"ws://127.0.0.1:{port}/ws", args.turns, args.concurrency),
+    }
+    print(f"{'transport':<11} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'bytes/turn':>11}")
+    for name, bench in benches.items():
+        await bench()  # warm-up pass, not reported
+        start = time.perf_counter()
+        latencies, received = await bench()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<11} {args.turns / elapsed:>8.0f} {_percentile(latencies, 50):>8.2f} "
+            f"{_percentile(latencies, 95):>8.2f} {_percentile(latencies, 99):>8.2f} {received / args.turns:>11.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500, help="turns per transport")
+    parser.add_argument("--concurrency", type=int, default=4, help="turns in flight (runs per WebSocket)")
+    parser.add_argument("--chunks", type=int, default=50, help="TEXT_MESSAGE_CONTENT events per turn")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as replay_dir:
+        _write_recording(replay_dir, args.chunks)
+        port = _free_port()
+        proc = _start_server(replay_dir, port, args.concurrency)
+        try:
+            asyncio.run(run(args, port))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
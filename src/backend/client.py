@@ -3,10 +3,13 @@
 import asyncio
 import os
 
+import httpx
 from dotenv import load_dotenv
 from agent_framework import ChatAgent
 from agent_framework_ag_ui import AGUIChatClient
 
+from client_auth import BearerTokenAuth, get_token_provider
+
 # Load environment variables
 load_dotenv()
 
@@ -25,8 +28,15 @@ async def run_client():
     server_url = os.environ.get("AGUI_SERVER_URL", "http://127.0.0.1:8888/")
     print(f"Connecting to AG-UI server at: {server_url}\n")
 
+    # Sign in (or load the cached token) up front if auth is configured
+    token_provider = get_token_provider()
+    http_client = None
+    if token_provider:
+        await token_provider.atoken()
+        http_client = httpx.AsyncClient(timeout=60.0, auth=BearerTokenAuth(token_provider))
+
     # Create AG-UI chat client
-    chat_client = AGUIChatClient(endpoint=server_url)
+    chat_client = AGUIChatClient(endpoint=server_url, http_client=http_client)
 
     # Create agent with the chat client
     agent = ChatAgent(
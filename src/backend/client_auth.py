@@ -0,0 +1,112 @@
+"""Entra ID authentication for the CLI clients.
+
+Tokens are kept in a persistent, encrypted MSAL token cache (Keychain / DPAPI /
+libsecret) shared by every client process, and the signed-in account is remembered
+in an authentication record next to it. After the first interactive sign-in, clients
+start without a browser step and refresh their access token silently before it expires.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+from azure.core.credentials import AccessToken
+from azure.identity import AuthenticationRecord, InteractiveBrowserCredential, TokenCachePersistenceOptions
+
+GREEN = "\033[92m"
+RESET = "\033[0m"
+DIM = "\033[2m"
+
+# Name of the persistent MSAL cache, isolated from other applications
+TOKEN_CACHE_NAME = "agui-client"
+# Refresh the access token when it has less than this many seconds left
+REFRESH_MARGIN = 300
+
+
+def _auth_record_path() -> str:
+    return os.path.expanduser(os.environ.get("AGUI_AUTH_RECORD", "~/.agui/auth_record.json"))
+
+
+class TokenProvider:
+    """Thread- and task-safe access token source backed by the persistent cache."""
+
+    def __init__(self, tenant_id: str, client_id: str, scope: str) -> None:
+        self.scope = scope
+        self._record_path = _auth_record_path()
+        self._record = self._load_record()
+        self._credential = InteractiveBrowserCredential(
+            tenant_id=tenant_id,
+            client_id=client_id,
+            authentication_record=self._record,
+            cache_persistence_options=TokenCachePersistenceOptions(
+                name=TOKEN_CACHE_NAME,
+                allow_unencrypted_storage=os.environ.get("AGUI_TOKEN_CACHE_ALLOW_UNENCRYPTED", "").lower()
+                in ("1", "true", "yes", "on"),
+            ),
+        )
+        self._token: AccessToken | None = None
+        self._lock = threading.Lock()
+
+    def _load_record(self) -> AuthenticationRecord | None:
+        try:
+            with open(self._record_path, encoding="utf-8") as f:
+                return AuthenticationRecord.deserialize(f.read())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_record(self, record: AuthenticationRecord) -> None:
+        os.makedirs(os.path.dirname(self._record_path), exist_ok=True)
+        # The record identifies the account only; the tokens stay in the encrypted cache.
+        with open(os.open(self._record_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+            f.write(record.serialize())
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and self._token.expires_on - time.time() > REFRESH_MARGIN
+
+    def token(self) -> str:
+        """Return a valid access token, signing in interactively only if nothing is cached."""
+        with self._lock:
+            if not self._is_fresh():
+                if self._record is None:
+                    print(f"{DIM}Authenticating with Entra ID...{RESET}")
+                    self._record = self._credential.authenticate(scopes=[self.scope])
+                    self._save_record(self._record)
+                    print(f"{GREEN}✓ Authenticated{RESET}\n")
+                # Served from the persistent cache or refreshed silently with the refresh token.
+                self._token = self._credential.get_token(self.scope)
+            return self._token.token
+
+    async def atoken(self) -> str:
+        """Async variant of ``token()`` that keeps refreshes off the event loop."""
+        if self._is_fresh():
+            return self._token.token  # type: ignore[union-attr]
+        return await asyncio.to_thread(self.token)
+
+
+class BearerTokenAuth(httpx.Auth):
+    """httpx auth that adds a fresh bearer token to every request."""
+
+    def __init__(self, provider: TokenProvider) -> None:
+        self.provider = provider
+
+    def sync_auth_flow(self, request: httpx.Request):
+        request.headers["Authorization"] = f"Bearer {self.provider.token()}"
+        yield request
+
+    async def async_auth_flow(self, request: httpx.Request):
+        request.headers["Authorization"] = f"Bearer {await self.provider.atoken()}"
+        yield request
+
+
+def get_token_provider() -> TokenProvider | None:
+    """Create the token provider if Entra ID is configured."""
+    tenant_id = os.environ.get("ENTRA_TENANT_ID")
+    client_id = os.environ.get("ENTRA_PYTHON_CLIENT_ID")
+    api_scope = os.environ.get("ENTRA_API_SCOPE")
+
+    # Skip auth if not configured
+    if not tenant_id or not client_id or not api_scope:
+        return None
+    return TokenProvider(tenant_id, client_id, api_scope)
@@ -1,11 +1,24 @@
-"""AG-UI Raw Client - Shows all AG-UI protocol events including tool calls and approvals."""
+"""AG-UI Raw Client - Shows all AG-UI protocol events including tool calls and approvals.
 
+Run without arguments for the interactive client. With ``--load`` it runs headless:
+virtual users replay scripted multi-turn conversations concurrently and the client
+reports latency statistics instead of printing events.
+"""
+
+import argparse
 import asyncio
 import json
 import os
+import random
+import sys
+import time
+from contextlib import nullcontext, redirect_stdout
+from dataclasses import dataclass, field
+
 import httpx
 from dotenv import load_dotenv
-from azure.identity import InteractiveBrowserCredential
+
+from client_auth import BearerTokenAuth, get_token_provider
 
 # Load environment variables
 load_dotenv()
@@ -22,25 +35,22 @@ DIM = "\033[2m"
 BOLD = "\033[1m"
 
 
-def get_auth_token() -> str | None:
-    """Get authentication token if Entra ID is configured."""
-    tenant_id = os.environ.get("ENTRA_TENANT_ID")
-    client_id = os.environ.get("ENTRA_PYTHON_CLIENT_ID")
-    api_scope = os.environ.get("ENTRA_API_SCOPE")
-    
-    # Skip auth if not configured
-    if not tenant_id or not client_id or not api_scope:
-        return None
-    
-    print(f"{DIM}Authenticating with Entra ID...{RESET}")
-    credential = InteractiveBrowserCredential(
-        tenant_id=tenant_id,
-        client_id=client_id,
-    )
-    
-    token = credential.get_token(api_scope)
-    print(f"{GREEN}✓ Authenticated{RESET}\n")
-    return token.token
+async def iter_sse_data(response: httpx.Response):
+    """Yield the data of each server-sent event as soon as its terminating blank line arrives."""
+    data_lines: list[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(":"):
+            continue  # Comment / keep-alive
+        name, _, value = line.partition(":")
+        if name == "data":
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+    if data_lines:
+        yield "\n".join(data_lines)
 
 
 async def send_message(
@@ -48,8 +58,12 @@ async def send_message(
     messages: list[dict], 
     thread_id: str | None = None,
     auth_token: str | None = None,
+    client: httpx.AsyncClient | None = None,
 ):
-    """Send a message and stream the AG-UI response events."""
+    """Send a message and stream the AG-UI response events.
+
+    Pass ``client`` to reuse a pooled client; otherwise a new one is created for the call.
+    """
     
     # Build the AG-UI request payload
     payload: dict = {
@@ -63,24 +77,27 @@ async def send_message(
     if auth_token:
         headers["Authorization"] = f"Bearer {auth_token}"
     
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        async with client.stream(
-            "POST",
-            server_url,
-            json=payload,
-            headers=headers,
-        ) as response:
-            response.raise_for_status()
-            
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    data = line[6:]  # Remove "data: " prefix
-                    if data.strip():
-                        try:
-                            event = json.loads(data)
-                            yield event
-                        except json.JSONDecodeError:
-                            pass
+    if client is None:
+        async with httpx.AsyncClient(timeout=120.0) as own_client:
+            async for event in send_message(server_url, messages, thread_id, auth_token, own_client):
+                yield event
+        return
+
+    async with client.stream(
+        "POST",
+        server_url,
+        json=payload,
+        headers=headers,
+    ) as response:
+        response.raise_for_status()
+
+        async for data in iter_sse_data(response):
+            if data.strip():
+                try:
+                    event = json.loads(data)
+                    yield event
+                except json.JSONDecodeError:
+                    pass
 
 
 def format_event(event: dict) -> str | None:
@@ -151,8 +168,10 @@ async def run_client():
     print(f"Server: {server_url}")
     print(f"{DIM}This client shows all AG-UI protocol events including approvals{RESET}\n")
 
-    # Get auth token if configured
-    auth_token = get_auth_token()
+    # Sign in (or load the cached token) up front if auth is configured
+    token_provider = get_token_provider()
+    if token_provider:
+        await token_provider.atoken()
 
     # Conversation history
     messages: list[dict] = []
@@ -177,6 +196,7 @@ async def run_client():
             print(f"{BOLD}Events:{RESET}")
             
             assistant_content = ""
+            auth_token = await token_provider.atoken() if token_provider else None
             
             async for event in send_message(server_url, messages, thread_id, auth_token):
                 event_type = event.get("type", "")
@@ -216,9 +236,222 @@ async def run_client():
         print(f"\n{RED}Error: {e}{RESET}")
 
 
+@dataclass
+class TurnResult:
+    """Timings for one request/response turn of a virtual user."""
+
+    ttfe: float | None = None
+    latency: float | None = None
+    token_gaps: list[float] = field(default_factory=list)
+    events: int = 0
+    error: str | None = None
+
+
+def load_conversations(path: str) -> list[list[str]]:
+    """Load scripted conversations from a JSON file.
+
+    The file holds a list of conversations; each is either a list of user messages or
+    an object with a ``turns`` list, e.g. ``[{"name": "weather", "turns": ["Hi", "Weather in Paris?"]}]``.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    conversations = [item["turns"] if isinstance(item, dict) else item for item in data]
+    conversations = [[str(turn) for turn in turns] for turns in conversations if turns]
+    if not conversations:
+        raise ValueError(f"No conversations found in {path}")
+    return conversations
+
+
+async def run_turn(
+    client: httpx.AsyncClient,
+    server_url: str,
+    messages: list[dict],
+    thread_id: str | None,
+) -> tuple[TurnResult, str | None, str]:
+    """Send one turn and measure it. Returns the result, thread ID and assistant text."""
+    result = TurnResult()
+    assistant_content = ""
+    finished = False
+    start = time.perf_counter()
+    last_token: float | None = None
+
+    try:
+        async for event in send_message(server_url, messages, thread_id, client=client):
+            now = time.perf_counter()
+            result.events += 1
+            if result.ttfe is None:
+                result.ttfe = now - start
+
+            event_type = event.get("type", "")
+            if event_type == "RUN_STARTED" and not thread_id:
+                thread_id = event.get("threadId")
+            elif event_type == "TEXT_MESSAGE_CONTENT":
+                if last_token is not None:
+                    result.token_gaps.append(now - last_token)
+                last_token = now
+                assistant_content += event.get("delta", "")
+            elif event_type == "RUN_FINISHED":
+                finished = True
+            elif event_type == "RUN_ERROR":
+                result.error = "RUN_ERROR"
+        if not finished and result.error is None:
+            result.error = "incomplete stream"
+    except httpx.HTTPStatusError as e:
+        result.error = f"HTTP {e.response.status_code}"
+    except httpx.TimeoutException:
+        result.error = "timeout"
+    except httpx.HTTPError as e:
+        result.error = type(e).__name__
+
+    result.latency = time.perf_counter() - start
+    return result, thread_id, assistant_content
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    server_url: str,
+    conversation: list[str],
+    think_time: float,
+    results: list[TurnResult],
+) -> None:
+    """Play one scripted conversation, keeping history and thread like the interactive client."""
+    messages: list[dict] = []
+    thread_id = None
+    for i, user_input in enumerate(conversation):
+        if i and think_time:
+            await asyncio.sleep(think_time)
+        messages.append({"role": "user", "content": user_input})
+        result, thread_id, assistant_content = await run_turn(client, server_url, messages, thread_id)
+        results.append(result)
+        if result.error:
+            break  # The rest of the script depends on this turn
+        if assistant_content:
+            messages.append({"role": "assistant", "content": assistant_content})
+
+
+def percentiles(values: list[float]) -> dict[str, float | None]:
+    """p50/p90/p95/p99 and max in milliseconds (linear interpolation)."""
+    if not values:
+        return {"p50": None, "p90": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    stats = {}
+    for p in (50, 90, 95, 99):
+        rank = (len(ordered) - 1) * p / 100
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        stats[f"p{p}"] = round((ordered[low] + (ordered[high] - ordered[low]) * (rank - low)) * 1000, 2)
+    stats["max"] = round(ordered[-1] * 1000, 2)
+    return stats
+
+
+def summarize(results: list[TurnResult], elapsed: float, users: int) -> dict:
+    """Aggregate turn results into the load-test report."""
+    errors: dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    ok = [r for r in results if not r.error]
+    return {
+        "users": users,
+        "turns": len(results),
+        "ok": len(ok),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_turns_per_s": round(len(results) / elapsed, 3) if elapsed else None,
+        "ttfe_ms": percentiles([r.ttfe for r in results if r.ttfe is not None]),
+        "inter_token_gap_ms": percentiles([gap for r in ok for gap in r.token_gaps]),
+        "run_latency_ms": percentiles([r.latency for r in ok if r.latency is not None]),
+    }
+
+
+def print_report(report: dict) -> None:
+    """Print the load-test report as a table."""
+    print(f"\n{BOLD}Load test{RESET}: {report['users']} users, {report['turns']} turns "
+          f"({report['ok']} ok) in {report['duration_s']:.1f}s, "
+          f"{report['throughput_turns_per_s'] or 0:.2f} turns/s")
+    print(f"\n{'metric (ms)':<20}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for label, key in (("time to 1st event", "ttfe_ms"), ("inter-token gap", "inter_token_gap_ms"), ("run latency", "run_latency_ms")):
+        row = report[key]
+        cells = "".join(f"{'-' if row[p] is None else f'{row[p]:.1f}':>10}" for p in ("p50", "p90", "p95", "p99", "max"))
+        print(f"{label:<20}{cells}")
+    if report["errors"]:
+        print(f"\n{RED}Errors:{RESET}")
+        for kind, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {kind:<30}{count:>6}")
+    else:
+        print(f"\n{GREEN}No errors{RESET}")
+
+
+def make_pooled_client(users: int, auth: httpx.Auth | None = None) -> httpx.AsyncClient:
+    """Create one HTTP client shared by all virtual users (HTTP/2 when ``h2`` is installed)."""
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        print(f"{DIM}h2 not installed (pip install 'httpx[http2]'), using HTTP/1.1{RESET}")
+        http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        auth=auth,
+        timeout=httpx.Timeout(120.0, connect=10.0),
+        limits=httpx.Limits(max_connections=users, max_keepalive_connections=users),
+    )
+
+
+async def run_load_test(args: argparse.Namespace) -> dict:
+    """Run the headless load test and return the report."""
+    server_url = os.environ.get("AGUI_SERVER_URL", "http://127.0.0.1:8888/")
+    conversations = load_conversations(args.load)
+    token_provider = get_token_provider()
+    if token_provider:
+        await token_provider.atoken()
+    results: list[TurnResult] = []
+
+    print(f"{BOLD}AG-UI load test{RESET}: {server_url}, {args.users} users, "
+          f"{len(conversations)} scripted conversations, arrival rate {args.rate or 'all at once'}/s")
+
+    # All virtual users share one token; it is refreshed silently before it expires.
+    auth = BearerTokenAuth(token_provider) if token_provider else None
+    async with make_pooled_client(args.users, auth) as client:
+        start = time.perf_counter()
+        tasks = []
+        for i in range(args.users):
+            if args.rate > 0 and i:
+                await asyncio.sleep(random.expovariate(args.rate))  # Poisson arrivals
+            conversation = conversations[i % len(conversations)]
+            tasks.append(asyncio.create_task(
+                virtual_user(client, server_url, conversation, args.think_time, results)
+            ))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return summarize(results, elapsed, args.users)
+
+
 def main():
     """Entry point."""
-    asyncio.run(run_client())
+    parser = argparse.ArgumentParser(description="AG-UI raw client and load generator")
+    parser.add_argument("--load", metavar="SCRIPT", help="run headless load test with conversations from a JSON file")
+    parser.add_argument("--users", type=int, default=10, help="number of concurrent virtual users (default: 10)")
+    parser.add_argument("--rate", type=float, default=0.0, help="virtual user arrivals per second, 0 starts all at once")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between turns of a conversation")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    if not args.load:
+        asyncio.run(run_client())
+        return
+
+    # With --json - stdout carries only the JSON; progress and the table go to stderr.
+    with redirect_stdout(sys.stderr) if args.json == "-" else nullcontext():
+        report = asyncio.run(run_load_test(args))
+        print_report(report)
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"{DIM}Report written to {args.json}{RESET}")
 
 
 if __name__ == "__main__":
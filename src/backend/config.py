@@ -6,6 +6,25 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from the environment ("1", "true", "yes", "on")."""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_map(name: str, default: str = "") -> dict[str, float]:
+    """Read a ``"name=value,name=value"`` map of numbers from the environment."""
+    result: dict[str, float] = {}
+    for item in os.environ.get(name, default).split(","):
+        key, sep, value = item.partition("=")
+        if sep and key.strip():
+            result[key.strip()] = float(value)
+    return result
+
+
 # Entra ID configuration
 ENTRA_TENANT_ID = os.environ.get("ENTRA_TENANT_ID", "")
 ENTRA_AUDIENCE = os.environ.get("ENTRA_AUDIENCE", "")
@@ -14,11 +33,18 @@ ENTRA_AUDIENCE = os.environ.get("ENTRA_AUDIENCE", "")
 AZURE_OPENAI_ENDPOINT = os.environ.get("AZURE_OPENAI_ENDPOINT")
 AZURE_OPENAI_DEPLOYMENT_NAME = os.environ.get("AZURE_OPENAI_DEPLOYMENT_NAME")
 
-# Validate required configuration
-if not AZURE_OPENAI_ENDPOINT:
-    raise ValueError("AZURE_OPENAI_ENDPOINT environment variable is required")
-if not AZURE_OPENAI_DEPLOYMENT_NAME:
-    raise ValueError("AZURE_OPENAI_DEPLOYMENT_NAME environment variable is required")
+
+def validate_config() -> None:
+    """Validate required configuration.
+
+    Called when the agent stack is built (app lifespan or first use) rather than at
+    import time, so tools and benchmarks can import modules without Azure settings.
+    """
+    if not AZURE_OPENAI_ENDPOINT:
+        raise ValueError("AZURE_OPENAI_ENDPOINT environment variable is required")
+    if not AZURE_OPENAI_DEPLOYMENT_NAME:
+        raise ValueError("AZURE_OPENAI_DEPLOYMENT_NAME environment variable is required")
+
 
 # Cache durations
 JWKS_CACHE_DURATION = 86400  # 24 hours
@@ -29,3 +55,132 @@ SERVER_PORT = 8888
 
 # CORS configuration
 CORS_ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
+
+# Logging configuration
+# "text" (default) or "json" (one JSON object per line)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+# Write log records from a background thread instead of on the event loop
+LOG_QUEUE_ENABLED = _env_flag("LOG_QUEUE_ENABLED", default=True)
+# Per-logger sampling / rate limiting for high-volume loggers,
+# e.g. "agui.state=0.1" (keep 10%) and "agui.tools=50" (max 50 records/s)
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+LOG_RATE_LIMITS = os.environ.get("LOG_RATE_LIMITS", "")
+
+# Tracing configuration (OpenTelemetry). Disabled by default; when disabled no
+# SDK is loaded and all spans are no-ops.
+OTEL_TRACING_ENABLED = _env_flag("OTEL_TRACING_ENABLED")
+OTEL_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "agui-server")
+# Fraction of new traces to record (0.0 - 1.0). Child spans follow the parent's decision.
+OTEL_TRACES_SAMPLER_RATIO = float(os.environ.get("OTEL_TRACES_SAMPLER_RATIO", "1.0"))
+# "file" (JSON lines, works offline), "otlp" (gRPC collector) or "console"
+OTEL_TRACES_EXPORTER = os.environ.get("OTEL_TRACES_EXPORTER", "file")
+OTEL_TRACES_FILE = os.environ.get("OTEL_TRACES_FILE", "traces.jsonl")
+OTEL_EXPORTER_OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+
+# Metrics configuration (OpenTelemetry). Disabled by default.
+OTEL_METRICS_ENABLED = _env_flag("OTEL_METRICS_ENABLED")
+# "file" (JSON lines, works offline), "otlp" (gRPC collector) or "console"
+OTEL_METRICS_EXPORTER = os.environ.get("OTEL_METRICS_EXPORTER", "file")
+OTEL_METRICS_FILE = os.environ.get("OTEL_METRICS_FILE", "metrics.jsonl")
+OTEL_METRICS_EXPORT_INTERVAL = int(os.environ.get("OTEL_METRICS_EXPORT_INTERVAL", "30"))  # seconds
+
+# Event-loop health monitoring
+LOOP_MONITOR_ENABLED = _env_flag("LOOP_MONITOR_ENABLED", default=True)
+LOOP_MONITOR_INTERVAL = float(os.environ.get("LOOP_MONITOR_INTERVAL", "0.1"))  # seconds
+# Log the event loop's stack when it is blocked for longer than this
+LOOP_STALL_THRESHOLD = float(os.environ.get("LOOP_STALL_THRESHOLD", "0.25"))  # seconds
+
+# Per-run sampling profiler, triggered by sending "X-Agui-Profile: <PROFILE_ADMIN_TOKEN>".
+# Disabled when no token is configured.
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))  # seconds
+
+# Record / replay of AG-UI event streams (for load testing without model calls).
+# When AGUI_RECORD_DIR is set, every run is recorded there as gzip JSONL.
+AGUI_RECORD_DIR = os.environ.get("AGUI_RECORD_DIR", "")
+# When AGUI_REPLAY_DIR is set, runs are served from recordings instead of the agent.
+AGUI_REPLAY_DIR = os.environ.get("AGUI_REPLAY_DIR", "")
+# Playback speed: 1.0 = original timing, 2.0 = twice as fast, 0 = as fast as possible
+AGUI_REPLAY_SPEED = float(os.environ.get("AGUI_REPLAY_SPEED", "1.0"))
+# "prompt" (match the last user message, else random) or "random"
+AGUI_REPLAY_MATCH = os.environ.get("AGUI_REPLAY_MATCH", "prompt")
+
+# Shared-state sync: send STATE_DELTA (JSON Patch) instead of STATE_SNAPSHOT when smaller
+STATE_DELTA_ENABLED = _env_flag("STATE_DELTA_ENABLED", default=True)
+# Send a full snapshot at least every N state updates within a run
+STATE_FULL_SNAPSHOT_EVERY = int(os.environ.get("STATE_FULL_SNAPSHOT_EVERY", "10"))
+
+# Startup warm-up (connection pools, credentials, JWKS) before /ready reports ready
+WARMUP_ENABLED = _env_flag("WARMUP_ENABLED", default=True)
+# Also run one synthetic agent turn (costs one model call per startup)
+WARMUP_SYNTHETIC_TURN = _env_flag("WARMUP_SYNTHETIC_TURN")
+WARMUP_STEP_TIMEOUT = float(os.environ.get("WARMUP_STEP_TIMEOUT", "30"))
+# Seconds before the first retry of a failed required step (doubles up to 5 minutes)
+WARMUP_RETRY_INTERVAL = float(os.environ.get("WARMUP_RETRY_INTERVAL", "10"))
+
+# Tool execution: sync tools run in a bounded thread pool so calls from one turn overlap
+TOOL_THREAD_POOL_SIZE = int(os.environ.get("TOOL_THREAD_POOL_SIZE", "8"))
+# Default per-call timeout in seconds (0 = no timeout) and per-tool overrides,
+# e.g. "get_weather=15,tell_bedtime_story=90"
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "30"))
+TOOL_TIMEOUTS = os.environ.get("TOOL_TIMEOUTS", "tell_bedtime_story=90")
+# Max concurrent calls per tool across all runs, e.g. "get_weather=4"
+TOOL_CONCURRENCY = os.environ.get("TOOL_CONCURRENCY", "")
+
+# Speculative weather prefetch: start fetching as soon as approval for a location is
+# requested, and reuse the result if it is approved. Opt-in: it contacts Open-Meteo
+# before the user has approved the lookup.
+WEATHER_PREFETCH_ENABLED = _env_flag("WEATHER_PREFETCH_ENABLED")
+# Discard prefetched results that were not used within this many seconds
+WEATHER_PREFETCH_TTL = float(os.environ.get("WEATHER_PREFETCH_TTL", "120"))
+
+# Outbound HTTP for tools (tools/http_client.py): per-host pools, retries, circuit breaker
+TOOL_HTTP_CONNECT_TIMEOUT = float(os.environ.get("TOOL_HTTP_CONNECT_TIMEOUT", "2"))  # seconds
+TOOL_HTTP_READ_TIMEOUT = float(os.environ.get("TOOL_HTTP_READ_TIMEOUT", "4"))  # seconds
+# Retries for failed GETs (full-jitter exponential backoff from TOOL_HTTP_BACKOFF seconds),
+# all within TOOL_HTTP_DEADLINE seconds per call (attempt timeouts are capped to fit)
+TOOL_HTTP_RETRIES = int(os.environ.get("TOOL_HTTP_RETRIES", "2"))
+TOOL_HTTP_BACKOFF = float(os.environ.get("TOOL_HTTP_BACKOFF", "0.2"))
+TOOL_HTTP_DEADLINE = float(os.environ.get("TOOL_HTTP_DEADLINE", "8"))
+# Open a host's circuit after this many consecutive failed calls (not attempts); probe again
+# after the reset time
+TOOL_HTTP_BREAKER_THRESHOLD = int(os.environ.get("TOOL_HTTP_BREAKER_THRESHOLD", "5"))
+TOOL_HTTP_BREAKER_RESET = float(os.environ.get("TOOL_HTTP_BREAKER_RESET", "30"))  # seconds
+# Send a second (hedged) request if the first has not answered after this many seconds (0 = off)
+TOOL_HTTP_HEDGE_AFTER = float(os.environ.get("TOOL_HTTP_HEDGE_AFTER", "0"))
+# Serve the last good response for the same request, up to this old, when the upstream fails
+TOOL_HTTP_STALE_TTL = float(os.environ.get("TOOL_HTTP_STALE_TTL", "1800"))  # seconds
+
+# Open-Meteo endpoints (override to point the weather tool at a local fake upstream)
+WEATHER_GEOCODE_URL = os.environ.get("WEATHER_GEOCODE_URL", "https://geocoding-api.open-meteo.com/v1/search")
+WEATHER_FORECAST_URL = os.environ.get("WEATHER_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Send the run's token usage to the client as an AG-UI CUSTOM event ("token_usage") before
+# RUN_FINISHED. Usage is always logged and exported as metrics.
+TOKEN_USAGE_EVENT = _env_flag("TOKEN_USAGE_EVENT")
+
+# Exact-match cache of complete first-turn runs (same message, shared state and client tools)
+RESPONSE_CACHE_ENABLED = _env_flag("RESPONSE_CACHE_ENABLED")
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))  # seconds
+# Per-tool TTL for runs that called the tool (0 = never cache); the shortest one applies
+RESPONSE_CACHE_TOOL_TTLS = _env_map(
+    "RESPONSE_CACHE_TOOL_TTLS", "get_current_time=0,get_weather=300,approve_weather_request=300"
+)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "500"))
+RESPONSE_CACHE_MAX_MB = float(os.environ.get("RESPONSE_CACHE_MAX_MB", "50"))
+
+# WebSocket transport (/ws): concurrent runs per connection, run frames buffered per
+# connection before runs are paused, and seconds a client has to authenticate
+WS_MAX_RUNS_PER_CONNECTION = int(os.environ.get("WS_MAX_RUNS_PER_CONNECTION", "4"))
+WS_SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "256"))
+WS_AUTH_TIMEOUT = float(os.environ.get("WS_AUTH_TIMEOUT", "10"))
+
+# Run analytics: one record per run (timings, tools, events, bytes, tokens) written to
+# SQLite by a background thread in batches. Report with: python -m utils.run_analytics
+RUN_ANALYTICS_ENABLED = _env_flag("RUN_ANALYTICS_ENABLED")
+RUN_ANALYTICS_DB = os.environ.get("RUN_ANALYTICS_DB", "run_analytics.sqlite")
+RUN_ANALYTICS_BATCH_SIZE = int(os.environ.get("RUN_ANALYTICS_BATCH_SIZE", "100"))
+RUN_ANALYTICS_FLUSH_INTERVAL = float(os.environ.get("RUN_ANALYTICS_FLUSH_INTERVAL", "2"))  # seconds
+# Delete runs older than this many days (0 = keep everything)
+RUN_ANALYTICS_RETENTION_DAYS = float(os.environ.get("RUN_ANALYTICS_RETENTION_DAYS", "30"))
@@ -0,0 +1,76 @@
+"""Build the real agent stack and run a terminal-tool turn against a fake chat client.
+
+Run from ``src/backend`` with ``uv run python -m unittest``.
+"""
+
+import os
+import unittest
+from unittest import mock
+
+from agent_framework import (
+    BaseChatClient,
+    ChatResponseUpdate,
+    FunctionCallContent,
+    TextContent,
+    use_chat_middleware,
+    use_function_invocation,
+)
+
+import config
+from agents import main_agent
+from tools import terminal_reply
+
+AZURE_SETTINGS = {"AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/", "AZURE_OPENAI_DEPLOYMENT_NAME": "test"}
+
+
+@use_function_invocation
+@use_chat_middleware
+class FakeChatClient(BaseChatClient):
+    """Asks for ``get_current_time`` on the user turn and records every model call."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def _inner_get_response(self, *, messages, chat_options, **kwargs):
+        raise NotImplementedError
+
+    async def _inner_get_streaming_response(self, *, messages, chat_options, **kwargs):
+        self.calls += 1
+        if messages[-1].role.value == "user":
+            yield ChatResponseUpdate(
+                role="assistant", contents=[FunctionCallContent(call_id="c1", name="get_current_time", arguments="{}")]
+            )
+        else:
+            yield ChatResponseUpdate(role="assistant", contents=[TextContent(text="model follow-up")])
+
+
+class AgentTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        main_agent.get_agent.cache_clear()
+        self.addCleanup(main_agent.get_agent.cache_clear)
+
+    def test_get_agent_builds_with_azure_client(self) -> None:
+        main_agent.get_chat_client.cache_clear()
+        self.addCleanup(main_agent.get_chat_client.cache_clear)
+        with (
+            mock.patch.multiple(config, **AZURE_SETTINGS),
+            mock.patch.multiple(main_agent, **AZURE_SETTINGS),
+            mock.patch.dict(os.environ, {"AZURE_OPENAI_API_KEY": "test"}),
+        ):
+            agent = main_agent.get_agent()
+        tools = {tool.name: tool for tool in agent.chat_options.tools}
+        self.assertEqual(terminal_reply(tools["tell_bedtime_story"], {"language": "nl"}), "Slaap lekker.")
+        self.assertEqual(terminal_reply(tools["get_current_time"], {}), "⏰")
+
+    async def test_terminal_tool_turn_skips_follow_up_call(self) -> None:
+        client = FakeChatClient()
+        with mock.patch.object(main_agent, "get_chat_client", return_value=client):
+            agent = main_agent.get_agent()
+        text = "".join([update.text async for update in agent.run_stream("What time is it?")])
+        self.assertEqual(text, "⏰")
+        self.assertEqual(client.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
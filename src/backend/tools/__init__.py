@@ -3,11 +3,14 @@
 from .weather import get_weather
 from .time import get_current_time
 from .calculator import calculate
-from .storyteller import bedtime_story_tool
+from .storyteller import create_bedtime_story_tool
+from .terminal import terminal, terminal_reply
 
 __all__ = [
     "get_weather",
     "get_current_time",
     "calculate",
-    "bedtime_story_tool",
+    "create_bedtime_story_tool",
+    "terminal",
+    "terminal_reply",
 ]
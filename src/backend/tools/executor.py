@@ -0,0 +1,113 @@
+"""Concurrent tool execution with thread offloading, timeouts and concurrency limits.
+
+Agent Framework already starts all tool calls from one model turn together (with
+``asyncio.gather``, so results keep the order of the calls), but it calls sync tool
+functions directly on the event loop, which serializes them and stalls every other
+stream. ``ToolExecutor.wrap`` returns a copy of a tool whose function
+
+- runs in a bounded thread pool if it is sync (async functions run directly),
+- fails with a ``TimeoutError`` after the tool's timeout, and
+- waits for a per-tool semaphore when a concurrency limit is configured.
+
+On timeout an async tool is cancelled. A thread cannot be cancelled, so a sync tool
+that has started keeps running in the background: it keeps its pool thread and its
+semaphore slot until the function returns, so the limits hold for work still running.
+"""
+
+import asyncio
+import contextvars
+import copy
+import functools
+import inspect
+from collections.abc import Awaitable, Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any
+
+from agent_framework import AIFunction
+
+
+def parse_tool_map(raw: str) -> dict[str, float]:
+    """Parse ``"get_weather=15,tell_bedtime_story=90"`` into a dict."""
+    result: dict[str, float] = {}
+    for item in raw.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            result[name.strip()] = float(value)
+    return result
+
+
+class ToolExecutor:
+    """Wraps tools so independent calls from one model turn really run concurrently."""
+
+    def __init__(
+        self,
+        max_workers: int,
+        default_timeout: float,
+        timeouts: dict[str, float] | None = None,
+        concurrency: dict[str, float] | None = None,
+    ) -> None:
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._semaphores = {name: asyncio.Semaphore(int(limit)) for name, limit in (concurrency or {}).items()}
+
+    def wrap(self, tool: AIFunction) -> AIFunction:
+        """Return a copy of ``tool`` that runs under this executor.
+
+        A timed-out sync call is no longer awaited, but its slot is only released when
+        the thread finishes.
+        """
+        func = tool.func
+        if func is None:
+            return tool  # Declaration-only (client-side) tool
+
+        name = tool.name
+        timeout = self.timeouts.get(name, self.default_timeout) or None
+        semaphore = self._semaphores.get(name)
+        is_async = inspect.iscoroutinefunction(func)
+        pool = self._pool
+
+        @functools.wraps(func)
+        async def run(*args: Any, **kwargs: Any) -> Any:
+            if is_async:
+                async with semaphore or nullcontext():
+                    return await _with_timeout(func(*args, **kwargs))
+
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                # Copy the context so the tool's spans and logs keep the run's trace.
+                ctx = contextvars.copy_context()
+                future = pool.submit(ctx.run, func, *args, **kwargs)
+            except BaseException:
+                if semaphore is not None:
+                    semaphore.release()
+                raise
+            if semaphore is not None:
+                # Released when the thread is done (or the call never started), not on timeout.
+                future.add_done_callback(_release_from_thread(asyncio.get_running_loop(), semaphore))
+            return await _with_timeout(asyncio.wrap_future(future))
+
+        async def _with_timeout(call: Awaitable[Any]) -> Any:
+            try:
+                return await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Tool {name} timed out after {timeout}s") from None
+
+        wrapped = copy.copy(tool)
+        wrapped.func = run
+        return wrapped
+
+    def wrap_all(self, tools: Sequence[AIFunction]) -> list[AIFunction]:
+        return [self.wrap(tool) for tool in tools]
+
+
+def _release_from_thread(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore) -> Callable[[Any], None]:
+    def release(_: Future) -> None:
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            pass  # Loop already closed (shutdown)
+
+    return release
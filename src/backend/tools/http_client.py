@@ -0,0 +1,280 @@
+"""Resilient outbound HTTP for tools.
+
+Tools call upstream APIs from worker threads (see ``tools.executor``), so this layer is
+synchronous. ``ResilientHttp.get_json`` adds, per upstream host:
+
+- its own connection pool with tight connect and read timeouts,
+- retries with full-jitter exponential backoff for failed GETs (transport errors,
+  429 and 5xx), all within an overall deadline (each attempt's timeouts are capped
+  at the time left),
+- a circuit breaker that opens after consecutive failed calls (a call fails once,
+  however many attempts it made) and then fails fast, or serves the last good
+  response for the same request if one is cached, and
+- optional hedging: if the first attempt has not answered after ``hedge_after``
+  seconds, a second identical request races it.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import (
+    TOOL_HTTP_BACKOFF,
+    TOOL_HTTP_BREAKER_RESET,
+    TOOL_HTTP_BREAKER_THRESHOLD,
+    TOOL_HTTP_CONNECT_TIMEOUT,
+    TOOL_HTTP_DEADLINE,
+    TOOL_HTTP_HEDGE_AFTER,
+    TOOL_HTTP_READ_TIMEOUT,
+    TOOL_HTTP_RETRIES,
+    TOOL_HTTP_STALE_TTL,
+)
+from utils import logger
+from utils.metrics import meter
+from utils.tracing import TracingTransport
+
+_request_counter = meter.create_counter(
+    "agui.http.requests",
+    description="Outbound tool HTTP requests by host and outcome",
+)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """The upstream failed (or its circuit is open) and no cached response was available."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open -> closed)."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """Whether a request may go upstream; after the cooldown a single probe is let through."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit closed: %s", self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                logger.warning("Circuit open: %s (%d consecutive failures)", self.name, self.failures)
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self) -> None:
+        """End a half-open probe that recorded no outcome, so the next call can probe."""
+        with self._lock:
+            self._probing = False
+
+
+class ResilientHttp:
+    """Shared outbound HTTP client for tools (see module docstring)."""
+
+    def __init__(
+        self,
+        connect_timeout: float = 2.0,
+        read_timeout: float = 4.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        deadline: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        hedge_after: float = 0.0,
+        stale_ttl: float = 1800.0,
+        cache_size: int = 256,
+    ) -> None:
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.deadline = deadline
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.hedge_after = hedge_after
+        self.stale_ttl = stale_ttl
+        self.cache_size = cache_size
+        self.outcomes: Counter[str] = Counter()
+        self._clients: dict[str, httpx.Client] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._cache: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Threads are only started once a request is hedged.
+        self._hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+    def client(self, url: str) -> httpx.Client:
+        """The pooled client for ``url``'s host."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            client = self._clients.get(host)
+            if client is None:
+                client = self._clients[host] = httpx.Client(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                    transport=TracingTransport(),
+                )
+            return client
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, self.breaker_threshold, self.breaker_reset)
+            return breaker
+
+    def get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        """GET ``url`` and decode JSON, with retries, circuit breaking and stale fallback.
+
+        Raises ``UpstreamError`` when the upstream is unavailable and nothing is cached;
+        a 4xx response other than 429 raises ``httpx.HTTPStatusError`` without retrying.
+        """
+        host = urlsplit(url).netloc
+        key = (url, tuple(sorted((params or {}).items())))
+        breaker = self.breaker(url)
+        deadline_at = time.monotonic() + self.deadline
+        error: Exception | None = None
+        failed = False
+
+        try:
+            for attempt in range(self.retries + 1):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    error = error or UpstreamError(f"Deadline of {self.deadline}s exceeded for {host}")
+                    break
+                if not breaker.allow():
+                    error = error or UpstreamError(f"Circuit open for {host}")
+                    self._count(host, "short_circuit")
+                    break
+                try:
+                    response = self._send(url, params, self._attempt_timeout(remaining))
+                    if response.status_code in RETRYABLE_STATUS or response.status_code >= 500:
+                        raise httpx.HTTPStatusError(
+                            f"{response.status_code} from {host}", request=response.request, response=response
+                        )
+                    data = None if response.is_error else response.json()
+                except (httpx.TransportError, httpx.HTTPStatusError, ValueError) as exc:
+                    failed = True
+                    error = exc
+                    self._count(host, "error")
+                    delay = random.uniform(0, self.backoff * 2**attempt)
+                    if attempt == self.retries or time.monotonic() + delay >= deadline_at:
+                        break
+                    logger.info("Retrying GET %s in %.2fs after %r", host, delay, exc)
+                    time.sleep(delay)
+                    continue
+
+                # Any other answer means the upstream is up, even a 4xx for a bad request.
+                failed = False
+                breaker.record_success()
+                if response.is_error:
+                    self._count(host, "client_error")
+                    response.raise_for_status()
+                self._count(host, "ok")
+                with self._lock:
+                    self._cache[key] = (time.monotonic(), data)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                return data
+        finally:
+            # One failure per call, however many attempts it made. Calls that end without
+            # an upstream answer or failure (e.g. an unexpected error) still free the probe.
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.release_probe()
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] <= self.stale_ttl:
+            self._count(host, "stale")
+            logger.warning("Serving cached response for %s after %r", host, error)
+            return cached[1]
+        raise UpstreamError(f"{host} unavailable: {error}") from error
+
+    def _attempt_timeout(self, remaining: float) -> httpx.Timeout:
+        """The client timeouts, capped at the time left until the call's deadline."""
+        return httpx.Timeout(
+            min(self.timeout.read or remaining, remaining),
+            connect=min(self.timeout.connect or remaining, remaining),
+        )
+
+    def _send(self, url: str, params: dict[str, Any] | None, timeout: httpx.Timeout) -> httpx.Response:
+        client = self.client(url)
+        if self.hedge_after <= 0:
+            return client.get(url, params=params, timeout=timeout)
+
+        pool = self._hedge_pool
+        first = pool.submit(contextvars.copy_context().run, client.get, url, params=params, timeout=timeout)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+
+        # The first attempt is slow: race an identical request and take whichever answers first.
+        self._count(urlsplit(url).netloc, "hedged")
+        second = pool.submit(contextvars.copy_context().run, client.get, url, params=params, timeout=timeout)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None:
+            # The faster attempt failed; wait for the other one instead.
+            return (second if winner is first else first).result()
+        return winner.result()
+
+    def _count(self, host: str, outcome: str) -> None:
+        self.outcomes[outcome] += 1
+        _request_counter.add(1, {"host": host, "outcome": outcome})
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+# Shared by all tools so connection pools, circuit state and the stale cache are per process.
+tool_http = ResilientHttp(
+    connect_timeout=TOOL_HTTP_CONNECT_TIMEOUT,
+    read_timeout=TOOL_HTTP_READ_TIMEOUT,
+    retries=TOOL_HTTP_RETRIES,
+    backoff=TOOL_HTTP_BACKOFF,
+    deadline=TOOL_HTTP_DEADLINE,
+    breaker_threshold=TOOL_HTTP_BREAKER_THRESHOLD,
+    breaker_reset=TOOL_HTTP_BREAKER_RESET,
+    hedge_after=TOOL_HTTP_HEDGE_AFTER,
+    stale_ttl=TOOL_HTTP_STALE_TTL,
+)
@@ -0,0 +1,132 @@
+"""Speculative prefetching of tool results.
+
+Some tools are only called after a human approves them (e.g. ``get_weather`` after
+``approve_weather_request``). A ``Prefetcher`` starts the tool's work in a background
+thread as soon as the approval is requested, so the tool call after approval can reuse
+the result instead of waiting for its own round trips. Denied or unused results are
+discarded, and every speculation's outcome is counted so the hit rate can be tracked.
+"""
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from utils import logger
+from utils.metrics import meter
+
+_outcome_counter = meter.create_counter(
+    "agui.prefetch.outcomes",
+    description="Speculative prefetches by outcome (hit, miss, denied, expired, failed)",
+)
+_saved_histogram = meter.create_histogram(
+    "agui.prefetch.saved",
+    unit="ms",
+    description="Tool latency saved after approval by a speculative prefetch",
+)
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+
+def _key(value: str) -> str:
+    return " ".join(value.lower().split())
+
+
+@dataclass
+class _Speculation:
+    future: Future
+    started: float
+    finished: float | None = None
+    call_ids: set[str] = field(default_factory=set)
+
+
+class Prefetcher:
+    """Runs ``fetch(arg)`` ahead of time and hands the result to the tool call that needs it."""
+
+    def __init__(self, name: str, fetch: Callable[[str], Any], ttl: float = 120.0, enabled: bool = False) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.ttl = ttl
+        self.enabled = enabled
+        self.outcomes: dict[str, int] = {}
+        self._pending: dict[str, _Speculation] = {}
+        self._lock = threading.RLock()
+
+    def start(self, arg: str, call_id: str | None = None) -> None:
+        """Start fetching ``arg`` in the background (approval for ``call_id`` was requested)."""
+        if not self.enabled:
+            return
+        key = _key(arg)
+        with self._lock:
+            self._expire()
+            speculation = self._pending.get(key)
+            if speculation is None:
+                future = _pool.submit(contextvars.copy_context().run, self.fetch, arg)
+                speculation = self._pending[key] = _Speculation(future, time.perf_counter())
+                future.add_done_callback(lambda _: setattr(speculation, "finished", time.perf_counter()))
+                logger.info("Prefetch started: %s(%r)", self.name, arg)
+            if call_id:
+                speculation.call_ids.add(call_id)
+
+    def discard(self, call_id: str) -> None:
+        """Drop the speculation started for a denied approval."""
+        with self._lock:
+            for key, speculation in list(self._pending.items()):
+                if call_id in speculation.call_ids:
+                    del self._pending[key]
+                    speculation.future.cancel()
+                    self._record("denied")
+                    logger.info("Prefetch discarded: %s (approval denied)", self.name)
+
+    def take(self, arg: str, timeout: float) -> Any | None:
+        """Return the prefetched result for ``arg``, or ``None`` if the caller must fetch it.
+
+        Blocks for up to ``timeout`` seconds if the prefetch is still running, so call
+        it from a worker thread.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._expire()
+            speculation = self._pending.pop(_key(arg), None)
+        if speculation is None:
+            self._record("miss")
+            return None
+
+        taken = time.perf_counter()
+        try:
+            result = speculation.future.result(timeout=timeout)
+        except Exception as exc:
+            self._record("failed")
+            logger.warning("Prefetch failed: %s(%r): %r", self.name, arg, exc)
+            return None
+
+        # The tool would have taken as long as the fetch did; it only waited for the rest.
+        fetch_time = (speculation.finished or time.perf_counter()) - speculation.started
+        saved = fetch_time - (time.perf_counter() - taken)
+        self._record("hit")
+        _saved_histogram.record(saved * 1000, {"tool": self.name})
+        logger.info("Prefetch hit: %s(%r) (saved %.3fs)", self.name, arg, saved)
+        return result
+
+    def hit_rate(self) -> float | None:
+        """Fraction of finished speculations that a tool call used (``miss`` is not a speculation)."""
+        with self._lock:
+            total = sum(n for outcome, n in self.outcomes.items() if outcome != "miss")
+            return self.outcomes.get("hit", 0) / total if total else None
+
+    def _expire(self) -> None:
+        now = time.perf_counter()
+        for key, speculation in list(self._pending.items()):
+            if now - speculation.started > self.ttl:
+                del self._pending[key]
+                speculation.future.cancel()
+                self._record("expired")
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        _outcome_counter.add(1, {"tool": self.name, "outcome": outcome})
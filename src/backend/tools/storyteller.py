@@ -1,23 +1,28 @@
 """Bedtime story sub-agent and tool."""
 
-from agent_framework import ChatAgent
-from agent_framework.azure import AzureOpenAIChatClient
-from azure.identity import DefaultAzureCredential
+from collections.abc import Sequence
+from typing import Any
 
-from config import AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT_NAME
+from agent_framework import AIFunction, ChatAgent, ChatClientProtocol
 
-# Create Azure OpenAI chat client
-chat_client = AzureOpenAIChatClient(
-    credential=DefaultAzureCredential(),
-    endpoint=AZURE_OPENAI_ENDPOINT,
-    deployment_name=AZURE_OPENAI_DEPLOYMENT_NAME,
-)
+from .terminal import terminal
 
-# Create a BedTimeStory agent that generates children's bedtime stories
-bedtime_story_agent = ChatAgent(
-    name="BedTimeStoryTeller",
-    description="A creative storyteller that writes engaging bedtime stories for children",
-    instructions="""You are a gentle and creative bedtime story teller. 
+# Closing line sent after the story, instead of asking the model for one
+CLOSING_REPLIES = {
+    "en": "Sweet dreams.",
+    "nl": "Slaap lekker.",
+    "en/pirate": "Sweet dreams, matey. Arr!",
+    "nl/pirate": "Slaap lekker, maatje. Arr!",
+}
+
+
+def create_bedtime_story_tool(chat_client: ChatClientProtocol, middleware: Sequence[Any] | None = None) -> AIFunction:
+    """Create the bedtime story agent on ``chat_client`` and expose it as a tool."""
+    # Create a BedTimeStory agent that generates children's bedtime stories
+    bedtime_story_agent = ChatAgent(
+        name="BedTimeStoryTeller",
+        description="A creative storyteller that writes engaging bedtime stories for children",
+        instructions="""You are a gentle and creative bedtime story teller. 
 When given a topic or theme, create a short, soothing bedtime story suitable for children.
 Your stories should:
 - Be 3-5 paragraphs long
@@ -25,13 +30,14 @@ Your stories should:
 - Include a gentle moral or lesson
 - End on a peaceful note that encourages sleep
 - Be age-appropriate and imaginative""",
-    chat_client=chat_client,
-)
+        chat_client=chat_client,
+        middleware=list(middleware or []),
+    )
 
-# Convert the bedtime story agent to a tool
-bedtime_story_tool = bedtime_story_agent.as_tool(
-    name="tell_bedtime_story",
-    description="Generate a calming bedtime story for children based on a given theme or topic",
-    arg_name="theme",
-    arg_description="The theme or topic for the bedtime story (e.g., 'a brave little rabbit', 'magical forest', 'friendly dragon')",
-)
+    # Convert the bedtime story agent to a terminal tool
+    return terminal(bedtime_story_agent.as_tool(
+        name="tell_bedtime_story",
+        description="Generate a calming bedtime story for children based on a given theme or topic",
+        arg_name="theme",
+        arg_description="The theme or topic for the bedtime story (e.g., 'a brave little rabbit', 'magical forest', 'friendly dragon')",
+    ), replies=CLOSING_REPLIES)
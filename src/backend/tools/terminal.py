@@ -0,0 +1,49 @@
+"""Terminal tools: tools whose result ends the run without a follow-up model call.
+
+After a terminal tool runs, ``terminal_tool_middleware`` answers the next model call
+itself with a fixed reply chosen by the shared state's language and style, so the
+agent does not pay an LLM round trip just to say "⏰" or "Sweet dreams.".
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+from agent_framework import AIFunction
+
+TERMINAL_REPLIES_KEY = "terminal_replies"
+
+
+def terminal(tool: AIFunction | None = None, *, replies: Mapping[str, str] | str | None = None):
+    """Mark ``tool`` (an ``ai_function`` or agent-as-tool) as terminal.
+
+    ``replies`` is the closing assistant text, either one string or a mapping looked
+    up by ``"<language>/<style>"``, then ``"<language>"``, then ``"default"``. Without
+    replies the run ends right after the tool result with no assistant text.
+
+    Use as a decorator above ``@ai_function`` (``@terminal(replies=...)``) or call it
+    on an existing tool (``terminal(agent.as_tool(...), replies=...)``).
+    """
+
+    def mark(target: AIFunction) -> AIFunction:
+        if isinstance(replies, str):
+            table = {"default": replies}
+        else:
+            table = dict(replies or {})
+        # Agent-as-tool functions start with additional_properties=None.
+        target.additional_properties = {**(target.additional_properties or {}), TERMINAL_REPLIES_KEY: table}
+        return target
+
+    return mark(tool) if tool is not None else mark
+
+
+def terminal_reply(tool: Any, state: Mapping[str, Any]) -> str | None:
+    """Return the closing reply for a terminal tool, or ``None`` if the tool is not terminal."""
+    table = (getattr(tool, "additional_properties", None) or {}).get(TERMINAL_REPLIES_KEY)
+    if table is None:
+        return None
+    language = state.get("language") or "en"
+    style = state.get("style") or "regular"
+    for key in (f"{language}/{style}", language, "default"):
+        if key in table:
+            return table[key]
+    return ""
@@ -1,61 +1,83 @@
 """Weather tool for getting current weather information."""
 
 import json
-import httpx
 from agent_framework import ai_function
 
+from config import WEATHER_FORECAST_URL, WEATHER_GEOCODE_URL, WEATHER_PREFETCH_ENABLED, WEATHER_PREFETCH_TTL
 from utils import logger
+from .http_client import tool_http
+from .prefetch import Prefetcher
+
+GEOCODE_URL = WEATHER_GEOCODE_URL
+FORECAST_URL = WEATHER_FORECAST_URL
+
+
+def warm_up() -> None:
+    """Open connections to both Open-Meteo hosts (DNS + TLS) before the first weather request."""
+    tool_http.client(GEOCODE_URL).get(GEOCODE_URL, params={"name": "Brussels", "count": 1, "format": "json"})
+    tool_http.client(FORECAST_URL).head(FORECAST_URL)
+
+
+def _fetch_weather(location: str) -> dict:
+    """Geocode ``location`` and fetch its current weather (upstream errors propagate)."""
+    # Step 1: Geocode the location to get coordinates
+    geocode_url = GEOCODE_URL
+    geocode_params = {"name": location, "count": 1, "language": "en", "format": "json"}
+    
+    geo_data = tool_http.get_json(geocode_url, params=geocode_params)
+    
+    if "results" not in geo_data or len(geo_data["results"]) == 0:
+        return {"error": f"Location '{location}' not found"}
+    
+    result = geo_data["results"][0]
+    lat = result["latitude"]
+    lon = result["longitude"]
+    resolved_name = result.get("name", location)
+    country = result.get("country", "")
+    
+    # Step 2: Get current weather
+    weather_url = FORECAST_URL
+    weather_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
+        "timezone": "auto",
+    }
+    
+    weather_data = tool_http.get_json(weather_url, params=weather_params)
+    
+    current = weather_data.get("current", {})
+    
+    # Map weather codes to conditions
+    weather_code = current.get("weather_code", 0)
+    condition = _weather_code_to_condition(weather_code)
+    
+    return {
+        "location": f"{resolved_name}, {country}".strip(", "),
+        "temperature": current.get("temperature_2m"),
+        "humidity": current.get("relative_humidity_2m"),
+        "wind_speed": current.get("wind_speed_10m"),
+        "condition": condition,
+    }
+
+
+# Started by the AG-UI endpoint when the model asks the user to approve a weather lookup.
+weather_prefetch = Prefetcher(
+    "get_weather", _fetch_weather, ttl=WEATHER_PREFETCH_TTL, enabled=WEATHER_PREFETCH_ENABLED
+)
 
 
 @ai_function(description="Get the current weather for a location")
 def get_weather(location: str) -> str:
     """Get real weather information for a location using Open-Meteo API."""
     try:
-        # Step 1: Geocode the location to get coordinates
-        geocode_url = "https://geocoding-api.open-meteo.com/v1/search"
-        geocode_params = {"name": location, "count": 1, "language": "en", "format": "json"}
+        data = weather_prefetch.take(location, timeout=10.0)
+        if data is None:
+            data = _fetch_weather(location)
+        return json.dumps(data)
         
-        with httpx.Client(timeout=10.0) as client:
-            geo_response = client.get(geocode_url, params=geocode_params)
-            geo_data = geo_response.json()
-            
-            if "results" not in geo_data or len(geo_data["results"]) == 0:
-                return json.dumps({"error": f"Location '{location}' not found"})
-            
-            result = geo_data["results"][0]
-            lat = result["latitude"]
-            lon = result["longitude"]
-            resolved_name = result.get("name", location)
-            country = result.get("country", "")
-            
-            # Step 2: Get current weather
-            weather_url = "https://api.open-meteo.com/v1/forecast"
-            weather_params = {
-                "latitude": lat,
-                "longitude": lon,
-                "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code",
-                "timezone": "auto",
-            }
-            
-            weather_response = client.get(weather_url, params=weather_params)
-            weather_data = weather_response.json()
-            
-            current = weather_data.get("current", {})
-            
-            # Map weather codes to conditions
-            weather_code = current.get("weather_code", 0)
-            condition = _weather_code_to_condition(weather_code)
-            
-            return json.dumps({
-                "location": f"{resolved_name}, {country}".strip(", "),
-                "temperature": current.get("temperature_2m"),
-                "humidity": current.get("relative_humidity_2m"),
-                "wind_speed": current.get("wind_speed_10m"),
-                "condition": condition,
-            })
-            
     except Exception as e:
-        logger.error(f"Weather API error: {e}")
+        logger.error("Weather API error: %s", e)
         return json.dumps({"error": str(e)})
 
 
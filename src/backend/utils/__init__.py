@@ -1,5 +1,5 @@
 """Utility functions and configurations."""
 
-from .logging import logger
+from .logging import logger, get_logger, Truncated
 
-__all__ = ["logger"]
+__all__ = ["logger", "get_logger", "Truncated"]
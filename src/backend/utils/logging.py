@@ -1,15 +1,204 @@
-"""Logging configuration for the application."""
+"""Logging configuration for the application.
 
+Records are handed to a ``QueueHandler`` on the calling thread and written to stdout
+by a ``QueueListener`` background thread, so a slow stdout (e.g. a Docker log driver
+under pressure) never stalls the event loop. High-volume loggers can additionally be
+sampled or rate limited.
+"""
+
+import atexit
+import copy
+import functools
+import json
 import logging
+import queue
+import random
+import reprlib
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_FORMAT, LOG_QUEUE_ENABLED, LOG_SAMPLE_RATES, LOG_RATE_LIMITS
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep roughly ``rate`` (0.0 - 1.0) of INFO-and-below records; always keep warnings and errors."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket limit of ``per_second`` INFO-and-below records; always keep warnings and errors."""
+
+    def __init__(self, per_second: float) -> None:
+        super().__init__()
+        self.per_second = per_second
+        self._tokens = per_second
+        self._updated = time.monotonic()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.per_second, self._tokens + (now - self._updated) * self.per_second)
+            self._updated = now
+            if self._tokens < 1:
+                self._dropped += 1
+                return False
+            self._tokens -= 1
+            if self._dropped:
+                # Surface how much was suppressed on the next record that gets through.
+                record.msg = f"{record.msg} [rate limited: {self._dropped} earlier messages dropped]"
+                self._dropped = 0
+            return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all message formatting to the writer thread.
+
+    ``msg`` and ``args`` are queued as they are; only args that could still change
+    before the listener formats them are frozen here, cheaply (see ``_freeze``).
+    Tracebacks are rendered here because their frames keep running.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, dict):
+            record.args = {key: _freeze(value) for key, value in record.args.items()}
+        elif record.args:
+            record.args = tuple(_freeze(arg) for arg in record.args)
+        record.exc_text = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class Truncated:
+    """Lazily truncate ``value`` for logging; ``str()`` is only computed if the record is emitted."""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: object, limit: int = 200) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        if len(text) > self.limit:
+            return text[: self.limit] + "..."
+        return text
+
+
+@functools.cache
+def _bounded_repr(limit: int) -> reprlib.Repr:
+    bounded = reprlib.Repr()
+    bounded.maxlevel = 3
+    bounded.maxdict = bounded.maxlist = bounded.maxtuple = bounded.maxset = 20
+    bounded.maxstring = bounded.maxother = limit
+    return bounded
+
+
+def _freeze(arg: object) -> object:
+    """Snapshot a log argument that may be mutated after the call, without formatting it in full."""
+    if isinstance(arg, Truncated):
+        if isinstance(arg.value, str):
+            return arg  # Immutable; truncated by the writer thread
+        # Bounded repr: cost grows with ``limit``, not with the size of the value.
+        return Truncated(_bounded_repr(arg.limit).repr(arg.value), arg.limit)
+    if isinstance(arg, (list, dict, set)):
+        return copy.copy(arg)
+    return arg
+
+
+def _parse_logger_map(raw: str) -> dict[str, float]:
+    """Parse ``"agui.state=0.1,agui.tools=0.5"`` into a dict."""
+    result: dict[str, float] = {}
+    for item in raw.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            result[name.strip()] = float(value)
+    return result
+
+
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setLevel(logging.INFO)
+_stdout_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+_sample_rates = _parse_logger_map(LOG_SAMPLE_RATES)
+_rate_limits = _parse_logger_map(LOG_RATE_LIMITS)
+
+
+def _get_handler() -> logging.Handler:
+    """Return the shared handler loggers attach to, starting the writer thread on first use."""
+    global _listener, _queue_handler
+
+    if not LOG_QUEUE_ENABLED:
+        return _stdout_handler
+    if _queue_handler is None:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _queue_handler = _DeferredQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, _stdout_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return _queue_handler
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get an application logger wired to the shared (queued) stdout handler."""
+    log = logging.getLogger(name)
+    log.setLevel(logging.INFO)
+    # Do not also pass records to the root logger: libraries (agent_framework) call
+    # logging.basicConfig(), which would write every record again, synchronously.
+    log.propagate = False
+    if not log.handlers:
+        log.addHandler(_get_handler())
+        if name in _sample_rates:
+            log.addFilter(SamplingFilter(_sample_rates[name]))
+        if name in _rate_limits:
+            log.addFilter(RateLimitFilter(_rate_limits[name]))
+    return log
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 # Configure logging with explicit stdout handler for Docker
-logger = logging.getLogger("agui.tools")
-logger.setLevel(logging.INFO)
-
-# Create stdout handler with formatting
-handler = logging.StreamHandler(sys.stdout)
-handler.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+logger = get_logger("agui.tools")
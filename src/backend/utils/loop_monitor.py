@@ -0,0 +1,168 @@
+"""Event-loop health monitoring and on-demand sampling profiler.
+
+``LoopMonitor`` runs a heartbeat task on the event loop and measures how late it
+wakes up (loop lag). A watchdog thread notices when the heartbeat stops for longer
+than the stall threshold and logs the event loop thread's stack at that moment,
+which points straight at the blocking call.
+
+``SamplingProfiler`` samples the event loop thread's stack at a fixed interval for
+the duration of one run and writes the samples in folded-stack format, which can be
+rendered with ``flamegraph.pl`` or loaded directly into speedscope. The loop thread
+also runs every other request, so given a marker frame (the run's own generator) it
+keeps only the samples taken while that run was executing.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from types import FrameType
+
+from .logging import logger
+from .metrics import meter
+
+_lag_histogram = meter.create_histogram(
+    "agui.event_loop.lag",
+    unit="ms",
+    description="How late the event loop heartbeat woke up",
+)
+_stall_counter = meter.create_counter(
+    "agui.event_loop.stalls",
+    description="Number of times the event loop was blocked longer than the stall threshold",
+)
+
+
+class LoopMonitor:
+    """Measure event-loop lag continuously and capture stacks of blocking calls."""
+
+    def __init__(self, interval: float, stall_threshold: float) -> None:
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the heartbeat task and watchdog thread (call from the running loop)."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Current loop health snapshot."""
+        return {
+            "last_lag_ms": round(self.last_lag_ms, 3),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "stalls": self.stalls,
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - start - self.interval) * 1000)
+            self._last_beat = now
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            _lag_histogram.record(lag_ms)
+
+    def _watch(self) -> None:
+        reported_beat: float | None = None
+        check_every = min(self.interval, self.stall_threshold / 2)
+        while not self._stop.wait(check_every):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.stall_threshold or beat == reported_beat:
+                continue
+            # Report each stall once, while it is still happening.
+            reported_beat = beat
+            self.stalls += 1
+            _stall_counter.add(1)
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+            logger.warning(
+                "Event loop blocked for %.0fms (threshold %.0fms). Event loop stack:\n%s",
+                blocked_for * 1000,
+                self.stall_threshold * 1000,
+                stack,
+            )
+
+
+class SamplingProfiler:
+    """Sample the calling thread's stack in a background thread and write a folded-stack file.
+
+    With a ``marker`` frame only stacks that contain it are kept; the rest (other
+    tasks on the loop, or the loop idling) are counted in ``skipped``.
+    """
+
+    def __init__(self, path: str, interval: float, marker: FrameType | None = None) -> None:
+        self.path = path
+        self.interval = interval
+        self.marker = marker
+        self.skipped = 0
+        self._samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target_thread_id = 0
+
+    def start(self) -> None:
+        self._target_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._sample, name="run-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling, write the profile and return its path."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in self._samples.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(
+            "Wrote profile with %d samples (%d of other tasks or idle skipped) to %s",
+            sum(self._samples.values()),
+            self.skipped,
+            self.path,
+        )
+        return self.path
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread_id)
+            frames: list[str] = []
+            marked = self.marker is None
+            while frame is not None:
+                marked = marked or frame is self.marker
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if not marked:
+                self.skipped += 1
+            elif frames:
+                self._samples[";".join(reversed(frames))] += 1
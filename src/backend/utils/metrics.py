@@ -0,0 +1,57 @@
+"""OpenTelemetry metrics setup.
+
+Like tracing, metrics are opt-in (``OTEL_METRICS_ENABLED``). Instruments created from
+the module-level ``meter`` are no-ops until ``setup_metrics()`` installs a provider.
+"""
+
+import os
+
+from opentelemetry import metrics
+
+from config import (
+    OTEL_METRICS_ENABLED,
+    OTEL_METRICS_EXPORTER,
+    OTEL_METRICS_FILE,
+    OTEL_METRICS_EXPORT_INTERVAL,
+    OTEL_SERVICE_NAME,
+    OTEL_EXPORTER_OTLP_ENDPOINT,
+)
+from .logging import logger
+
+meter = metrics.get_meter("agui")
+
+_metrics_configured = False
+
+
+def setup_metrics() -> None:
+    """Install the global meter provider if metrics are enabled."""
+    global _metrics_configured
+
+    if not OTEL_METRICS_ENABLED or _metrics_configured:
+        return
+
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import Resource
+
+    if OTEL_METRICS_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        except ImportError:
+            logger.error("OTLP exporter requested but opentelemetry-exporter-otlp-proto-grpc is not installed")
+            return
+        exporter = OTLPMetricExporter(endpoint=OTEL_EXPORTER_OTLP_ENDPOINT)
+    elif OTEL_METRICS_EXPORTER == "console":
+        exporter = ConsoleMetricExporter()
+    else:
+        out = open(OTEL_METRICS_FILE, "a", encoding="utf-8")
+        exporter = ConsoleMetricExporter(out=out, formatter=lambda data: data.to_json(indent=None) + os.linesep)
+
+    reader = PeriodicExportingMetricReader(exporter, export_interval_millis=OTEL_METRICS_EXPORT_INTERVAL * 1000)
+    provider = MeterProvider(
+        resource=Resource.create({"service.name": OTEL_SERVICE_NAME}),
+        metric_readers=[reader],
+    )
+    metrics.set_meter_provider(provider)
+    _metrics_configured = True
+    logger.info("Metrics enabled (exporter=%s)", OTEL_METRICS_EXPORTER)
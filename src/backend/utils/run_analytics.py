@@ -0,0 +1,298 @@
+"""Structured per-run analytics in a local SQLite database.
+
+Every AG-UI run produces one ``RunRecord``: IDs, user, transport, the preference keys
+of the shared state, the tools executed with their durations, event counts by type,
+bytes sent, time to first event and to the end, outcome and token usage. The endpoint
+hands finished records to ``RunAnalytics.submit``, which only puts them on a queue; a
+background thread writes them in batches (one transaction per batch) and deletes rows
+older than the retention period, so the request path never touches the database.
+
+Print latency, size and tool percentiles for recent runs with:
+
+    uv run python -m utils.run_analytics [--db run_analytics.sqlite] [--since 24h] [--by transport]
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+from .logging import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT,
+    thread_id TEXT,
+    user TEXT,
+    transport TEXT,
+    started_at REAL,
+    outcome TEXT,
+    first_event_ms REAL,
+    total_ms REAL,
+    events INTEGER,
+    bytes INTEGER,
+    event_counts TEXT,
+    state TEXT,
+    tool_calls INTEGER,
+    input_tokens INTEGER,
+    cached_input_tokens INTEGER,
+    output_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs (started_at);
+CREATE TABLE IF NOT EXISTS tool_calls (
+    run_id TEXT,
+    started_at REAL,
+    name TEXT,
+    duration_ms REAL,
+    ok INTEGER
+);
+CREATE INDEX IF NOT EXISTS tool_calls_started_at ON tool_calls (started_at);
+"""
+
+_PRUNE_EVERY = 3600.0  # seconds
+_STOP = object()
+
+
+@dataclass
+class ToolCall:
+    name: str
+    duration_ms: float
+    ok: bool
+
+
+@dataclass
+class RunRecord:
+    """What happened in one run; filled in by the endpoint and the tool middleware."""
+
+    run_id: str
+    thread_id: str
+    user: str
+    transport: str
+    state: dict[str, Any] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+    outcome: str = "incomplete"  # finished, error, incomplete (client went away or cancelled)
+    first_event_ms: float | None = None
+    total_ms: float | None = None
+    event_counts: Counter = field(default_factory=Counter)
+    bytes: int = 0
+    tools: list[ToolCall] = field(default_factory=list)
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    def event(self, event_type: str) -> None:
+        if self.first_event_ms is None:
+            self.first_event_ms = (time.perf_counter() - self._start) * 1000
+        self.event_counts[event_type] += 1
+
+    def tool(self, name: str, duration: float, ok: bool) -> None:
+        self.tools.append(ToolCall(name, duration * 1000, ok))
+
+    def finish(self) -> None:
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+
+    def _row(self) -> tuple:
+        return (
+            self.run_id,
+            self.thread_id,
+            self.user,
+            self.transport,
+            self.started_at,
+            self.outcome,
+            self.first_event_ms,
+            self.total_ms,
+            sum(self.event_counts.values()),
+            self.bytes,
+            json.dumps(self.event_counts),
+            json.dumps(self.state, ensure_ascii=False),
+            len(self.tools),
+            self.input_tokens,
+            self.cached_input_tokens,
+            self.output_tokens,
+        )
+
+
+class RunAnalytics:
+    """Queue of finished runs, written to SQLite by a background thread.
+
+    Args:
+        path: SQLite database file.
+        batch_size: Maximum records per transaction.
+        flush_interval: Seconds to wait for a batch to fill before writing it.
+        retention_days: Delete runs older than this (``0`` keeps everything).
+        max_queue: Records buffered before new ones are dropped (e.g. a stuck disk).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        retention_days: float = 30.0,
+        max_queue: int = 10_000,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="run-analytics", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write the queued records and stop the writer thread (blocking)."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, record: RunRecord) -> None:
+        """Queue a finished run for writing; never blocks."""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning("Run analytics queue full, %d records dropped", self.dropped)
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")  # reports can read while the server writes
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        next_prune = 0.0
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._write(conn, batch)
+            if self.retention_days and time.monotonic() >= next_prune:
+                self._prune(conn)
+                next_prune = time.monotonic() + _PRUNE_EVERY
+        conn.close()
+        logger.info("Run analytics stopped (%d runs written, %d dropped)", self.written, self.dropped)
+
+    def _next_batch(self) -> tuple[list[RunRecord], bool]:
+        """Wait for the first record, then collect up to ``batch_size`` within ``flush_interval``."""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn: sqlite3.Connection, batch: list[RunRecord]) -> None:
+        try:
+            with conn:
+                conn.executemany(f"INSERT INTO runs VALUES ({', '.join('?' * 16)})", [r._row() for r in batch])
+                conn.executemany(
+                    "INSERT INTO tool_calls VALUES (?, ?, ?, ?, ?)",
+                    [(r.run_id, r.started_at, t.name, t.duration_ms, t.ok) for r in batch for t in r.tools],
+                )
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.error("Writing %d run analytics records failed: %s", len(batch), e)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        cutoff = time.time() - self.retention_days * 86400
+        try:
+            with conn:
+                deleted = conn.execute("DELETE FROM runs WHERE started_at < ?", (cutoff,)).rowcount
+                conn.execute("DELETE FROM tool_calls WHERE started_at < ?", (cutoff,))
+            if deleted:
+                logger.info("Run analytics: deleted %d runs older than %g days", deleted, self.retention_days)
+        except sqlite3.Error as e:
+            logger.error("Pruning run analytics failed: %s", e)
+
+
+# Report CLI
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_since(value: str) -> float:
+    """``"24h"`` / ``"7d"`` / ``"30m"`` -> seconds."""
+    return float(value[:-1]) * _UNITS[value[-1]] if value[-1] in _UNITS else float(value)
+
+
+def _percentiles(values: list[float]) -> str:
+    if not values:
+        return f"{'-':>8} {'-':>8} {'-':>8} {'-':>8}"
+    ordered = sorted(values)
+    pick = [ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] for p in (50, 90, 95, 99)]
+    return " ".join(f"{v:>8.0f}" for v in pick)
+
+
+def report(db: str, since: float, by: str | None) -> None:
+    if not os.path.exists(db):
+        print(f"No run analytics database at {db} (set RUN_ANALYTICS_ENABLED=true on the server)")
+        return
+    conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True)
+    cutoff = time.time() - since
+    group = by or "'all'"
+    rows = conn.execute(
+        f"SELECT {group}, outcome, first_event_ms, total_ms, bytes, events FROM runs WHERE started_at >= ?",
+        (cutoff,),
+    ).fetchall()
+    groups: dict[str, list[tuple]] = defaultdict(list)
+    for row in rows:
+        groups[str(row[0])].append(row[1:])
+
+    header = f"{'':<20} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8}"
+    for name, runs in sorted(groups.items()):
+        outcomes = Counter(run[0] for run in runs)
+        print(f"{by or 'runs'}={name}: {len(runs)} runs ({', '.join(f'{k} {v}' for k, v in outcomes.most_common())})")
+        print(header)
+        print(f"{'first event ms':<20} {_percentiles([r[1] for r in runs if r[1] is not None])}")
+        print(f"{'total ms':<20} {_percentiles([r[2] for r in runs if r[2] is not None])}")
+        print(f"{'bytes':<20} {_percentiles([r[3] for r in runs])}")
+        print(f"{'events':<20} {_percentiles([r[4] for r in runs])}")
+        print()
+
+    tools: dict[str, list[tuple[float, int]]] = defaultdict(list)
+    for name, duration_ms, ok in conn.execute(
+        "SELECT name, duration_ms, ok FROM tool_calls WHERE started_at >= ?", (cutoff,)
+    ):
+        tools[name].append((duration_ms, ok))
+    if tools:
+        print(f"{'tool ms':<20} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'calls':>7} {'failed':>7}")
+        for name, calls in sorted(tools.items()):
+            failed = sum(1 for _, ok in calls if not ok)
+            print(f"{name:<20} {_percentiles([d for d, _ in calls])} {len(calls):>7} {failed / len(calls):>7.1%}")
+    if not rows:
+        print(f"No runs in the last {since / 3600:g}h")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Percentile report of recent runs from the run analytics store")
+    parser.add_argument("--db", default="run_analytics.sqlite", help="SQLite database (RUN_ANALYTICS_DB)")
+    parser.add_argument("--since", default="24h", help="time window, e.g. 30m, 24h, 7d (default: 24h)")
+    parser.add_argument("--by", choices=["transport", "user", "outcome"], help="group the run percentiles")
+    args = parser.parse_args()
+    report(args.db, _parse_since(args.since), args.by)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Per-run context shared between the AG-UI endpoint and agent middleware.
+
+The endpoint sets these at the start of each run; middleware deeper in the agent
+stack (which only sees chat messages) can read them without parsing prompts.
+"""
+
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .run_analytics import RunRecord
+    from .usage import UsageTotals
+
+# Shared state (language, style, ...) sent by the client for the current run
+shared_state: ContextVar[dict[str, Any]] = ContextVar("shared_state", default={})
+
+# Token usage of the current run (None outside a run)
+run_usage: ContextVar["UsageTotals | None"] = ContextVar("run_usage", default=None)
+
+# Name of the tool being executed; chat calls made by a tool (sub-agents) are attributed to it
+current_tool: ContextVar[str | None] = ContextVar("current_tool", default=None)
+
+# Analytics record of the current run (None outside a run or when analytics are disabled)
+run_record: ContextVar["RunRecord | None"] = ContextVar("run_record", default=None)
@@ -0,0 +1,225 @@
+"""OpenTelemetry tracing setup and helpers.
+
+Tracing is opt-in (``OTEL_TRACING_ENABLED``). Until ``setup_tracing()`` installs a
+tracer provider, the module-level ``tracer`` is OpenTelemetry's no-op proxy, so the
+spans created throughout the backend cost next to nothing.
+"""
+
+import threading
+from collections.abc import AsyncIterator, Sequence
+
+import httpx
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from config import (
+    OTEL_TRACING_ENABLED,
+    OTEL_SERVICE_NAME,
+    OTEL_TRACES_SAMPLER_RATIO,
+    OTEL_TRACES_EXPORTER,
+    OTEL_TRACES_FILE,
+    OTEL_EXPORTER_OTLP_ENDPOINT,
+)
+from .logging import logger
+
+tracer = trace.get_tracer("agui")
+
+_tracing_configured = False
+
+
+def _file_span_exporter(path: str):
+    """Create a span exporter that appends one JSON document per span to ``path``."""
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class FileSpanExporter(SpanExporter):
+        def __init__(self) -> None:
+            self._lock = threading.Lock()
+            self._file = open(path, "a", encoding="utf-8")
+
+        def export(self, spans: Sequence) -> SpanExportResult:
+            with self._lock:
+                for span in spans:
+                    self._file.write(span.to_json(indent=None) + "\n")
+                self._file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            with self._lock:
+                self._file.close()
+
+    return FileSpanExporter()
+
+
+def setup_tracing() -> None:
+    """Install the global tracer provider if tracing is enabled."""
+    global _tracing_configured
+
+    if not OTEL_TRACING_ENABLED or _tracing_configured:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if OTEL_TRACES_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.error("OTLP exporter requested but opentelemetry-exporter-otlp-proto-grpc is not installed")
+            return
+        exporter = OTLPSpanExporter(endpoint=OTEL_EXPORTER_OTLP_ENDPOINT)
+    elif OTEL_TRACES_EXPORTER == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        exporter = _file_span_exporter(OTEL_TRACES_FILE)
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": OTEL_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(OTEL_TRACES_SAMPLER_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracing_configured = True
+    logger.info(
+        "Tracing enabled (exporter=%s, sampler_ratio=%s)", OTEL_TRACES_EXPORTER, OTEL_TRACES_SAMPLER_RATIO
+    )
+
+
+async def tracing_middleware(request, call_next):
+    """Middleware that opens one server span per request, continuing any incoming trace context."""
+    if not OTEL_TRACING_ENABLED:
+        return await call_next(request)
+
+    parent = propagate.extract(request.headers)
+    span = tracer.start_span(
+        f"{request.method} {request.url.path}",
+        context=parent,
+        kind=SpanKind.SERVER,
+        attributes={
+            "http.request.method": request.method,
+            "url.path": request.url.path,
+        },
+    )
+    token = otel_context.attach(trace.set_span_in_context(span, parent))
+    try:
+        response = await call_next(request)
+    except Exception as exc:
+        span.record_exception(exc)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+        raise
+    finally:
+        otel_context.detach(token)
+
+    span.set_attribute("http.response.status_code", response.status_code)
+    if response.status_code >= 500:
+        span.set_status(Status(StatusCode.ERROR))
+
+    # Streaming responses keep producing events after call_next returns; keep the
+    # request span open until the body has been fully sent.
+    body_iterator = response.body_iterator
+
+    async def _traced_body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            span.end()
+
+    response.body_iterator = _traced_body()
+    return response
+
+
+def _start_http_span(request: httpx.Request):
+    span = tracer.start_span(
+        f"HTTP {request.method} {request.url.host}",
+        kind=SpanKind.CLIENT,
+        attributes={
+            "http.request.method": request.method,
+            "server.address": request.url.host,
+            "url.full": str(request.url.copy_with(query=None)),
+        },
+    )
+    propagate.inject(request.headers, context=trace.set_span_in_context(span))
+    return span
+
+
+def _end_http_span(span, response: httpx.Response | None = None, exc: Exception | None = None) -> None:
+    if response is not None:
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+    if exc is not None:
+        span.record_exception(exc)
+        span.set_status(Status(StatusCode.ERROR))
+    span.end()
+
+
+class TracingTransport(httpx.BaseTransport):
+    """httpx transport that wraps each outbound request in a client span."""
+
+    def __init__(self, transport: httpx.BaseTransport | None = None) -> None:
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        span = _start_http_span(request)
+        try:
+            response = self._transport.handle_request(request)
+        except Exception as exc:
+            _end_http_span(span, exc=exc)
+            raise
+        _end_http_span(span, response)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncTracingTransport(httpx.AsyncBaseTransport):
+    """Async variant of :class:`TracingTransport`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        span = _start_http_span(request)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception as exc:
+            _end_http_span(span, exc=exc)
+            raise
+        _end_http_span(span, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def traced_stream(span, stream: AsyncIterator) -> AsyncIterator:
+    """Re-yield ``stream`` inside ``span`` and end the span when the stream is exhausted.
+
+    The span is current only while the next item is produced (where the upstream HTTP
+    calls happen), never across a ``yield``, so the consumer's own spans don't nest under it.
+    """
+
+    async def _iterate():
+        iterator = aiter(stream)
+        try:
+            while True:
+                with trace.use_span(span, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                    try:
+                        item = await anext(iterator)
+                    except StopAsyncIteration:
+                        break
+                yield item
+        except Exception as exc:
+            span.record_exception(exc)
+            span.set_status(Status(StatusCode.ERROR))
+            raise
+        finally:
+            span.end()
+
+    return _iterate()
+
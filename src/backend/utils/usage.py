@@ -0,0 +1,79 @@
+"""Token usage accounting per run.
+
+``token_usage_middleware`` reports the usage of every chat-client call (the main agent
+and sub-agents such as the storyteller) to the run's ``UsageTotals``, which the AG-UI
+endpoint logs at the end of the run and can send to the client as a CUSTOM event.
+Every call is also counted in the ``agui.tokens`` metric.
+"""
+
+from dataclasses import dataclass, field
+
+from .metrics import meter
+
+_token_counter = meter.create_counter(
+    "agui.tokens",
+    unit="{token}",
+    description="Chat model tokens by source (agent or tool), model and type (uncached_input, cached_input, output)",
+)
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+
+    def add(self, input_tokens: int, cached_input_tokens: int, output_tokens: int) -> None:
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.cached_input_tokens += cached_input_tokens
+        self.output_tokens += output_tokens
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return self.input_tokens - self.cached_input_tokens
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "uncached_input_tokens": self.uncached_input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+@dataclass
+class UsageTotals:
+    """Token usage of one run, in total and per source ("agent" or the calling tool's name)."""
+
+    total: Usage = field(default_factory=Usage)
+    by_source: dict[str, Usage] = field(default_factory=dict)
+
+    def add(self, source: str, input_tokens: int, cached_input_tokens: int, output_tokens: int) -> None:
+        self.total.add(input_tokens, cached_input_tokens, output_tokens)
+        self.by_source.setdefault(source, Usage()).add(input_tokens, cached_input_tokens, output_tokens)
+
+    def as_dict(self) -> dict:
+        return {
+            **self.total.as_dict(),
+            "by_source": {source: usage.as_dict() for source, usage in self.by_source.items()},
+        }
+
+
+def record_usage(
+    totals: UsageTotals | None,
+    source: str,
+    model: str,
+    input_tokens: int,
+    cached_input_tokens: int,
+    output_tokens: int,
+) -> None:
+    """Count one chat call's tokens in the metrics and (if inside a run) the run's totals."""
+    attributes = {"source": source, "model": model}
+    _token_counter.add(input_tokens - cached_input_tokens, {**attributes, "type": "uncached_input"})
+    _token_counter.add(cached_input_tokens, {**attributes, "type": "cached_input"})
+    _token_counter.add(output_tokens, {**attributes, "type": "output"})
+    if totals is not None:
+        totals.add(source, input_tokens, cached_input_tokens, output_tokens)